@@ -0,0 +1,44 @@
+"""
+Shared setup for the example scripts: finding the adde binary they run against, and
+importing the adde package from this checkout when the installed one won't do.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+def adde_bin() -> str:
+    """
+    ADDE_BIN if set, else adde on PATH, else an adde built from this checkout into
+    go/build/ (go build only relinks when the sources changed). The committed go/adde
+    binaries are skipped: they predate tools the examples use (pipeline, adde repl).
+    """
+    if os.environ.get("ADDE_BIN"):
+        return os.environ["ADDE_BIN"]
+    found = shutil.which("adde")
+    if found:
+        return found
+    out = REPO_ROOT / "go" / "build" / ("adde.exe" if sys.platform == "win32" else "adde")
+    try:
+        subprocess.run(["go", "build", "-o", str(out), "./cmd/adde"], cwd=REPO_ROOT / "go", check=True)
+    except (OSError, subprocess.CalledProcessError) as e:
+        if out.is_file():
+            return str(out)  # built earlier; Go isn't needed to reuse it
+        sys.exit(f"Could not build adde ({e}); install Go, put adde on PATH or set ADDE_BIN.")
+    return str(out)
+
+
+def use_repo_adde() -> None:
+    """
+    Makes the next `import adde` load python/adde from this checkout. An adde imported
+    already (an older or unrelated install the example's import failed on) is dropped
+    from sys.modules first; otherwise the retried import would just return it again.
+    """
+    for name in [m for m in sys.modules if m == "adde" or m.startswith("adde.")]:
+        del sys.modules[name]
+    sys.path.insert(0, str(REPO_ROOT / "python"))
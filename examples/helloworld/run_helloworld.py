@@ -3,98 +3,131 @@
 Hello World example using the ADDE Python client.
 
 Builds a minimal Python app image, creates a container from it, runs the app,
-prints logs, then cleans up. Requires Docker and the adde binary (build from go/).
+prints logs, then cleans up, all as a single adde pipeline call. The image tag is
+derived from the app's files, so later runs reuse the image and skip the build.
+Requires Docker and an adde binary (ADDE_BIN, adde on PATH, or built from go/).
 """
 
+import hashlib
+import json
 import sys
-import time
 from pathlib import Path
+from typing import Optional
 
-# Add the python package to path so we can import adde from the repo
-_repo_root = Path(__file__).resolve().parents[2]
-sys.path.insert(0, str(_repo_root / "python"))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # examples/, for _adde
+from _adde import adde_bin, use_repo_adde
 
-from adde import (
-    prepare_build_context,
-    build_image_from_context,
-    create_runtime_env,
-    execute_code_block,
-    get_container_logs,
-    cleanup_env,
-)
+try:
+    from adde import list_agent_images, pipeline
+except ImportError:
+    # Not installed, or an installed adde without these: import adde from the repo
+    use_repo_adde()
+    from adde import list_agent_images, pipeline
+
+
+# Build context for the app image
+FILES = {
+    "requirements.txt": "",  # empty; template still adds pip install step
+    "main.py": 'print("Hello, World!")\n',
+}
+
+
+def image_tag(files: dict[str, str]) -> str:
+    """Content-addressed tag: the same files always map to the same image."""
+    digest = hashlib.blake2s(json.dumps(files, sort_keys=True).encode()).hexdigest()[:12]
+    return f"agent-env:helloworld-{digest}"
+
+
+def image_exists(tag: str, bin_path: Optional[str]) -> bool:
+    try:
+        images = list_agent_images(filter_tag=tag, bin_path=bin_path).get("images") or []
+    except RuntimeError:
+        return False  # e.g. Docker unreachable; the pipeline will report it
+    return any(tag in (im.get("tags") or []) for im in images)
 
 
 def main() -> None:
-    # Optional: point at the adde binary if not on PATH
-    adde_bin = _repo_root / "go" / "adde.exe" if sys.platform == "win32" else _repo_root / "go" / "adde"
-    bin_path = str(adde_bin) if adde_bin.is_file() else None
-
-    print("1. Preparing build context (hello world app, no Dockerfile -> one will be generated)...")
-    ctx = prepare_build_context(
-        files={
-            "requirements.txt": "",  # empty; template still adds pip install step
-            "main.py": 'print("Hello, World!")\n',
+    bin_path = adde_bin()
+
+    tag = image_tag(FILES)
+    prebuilt = image_exists(tag, bin_path)
+    build_steps = [
+        {
+            "id": "context",
+            "tool": "prepare_build_context",
+            "params": {"files": FILES},
         },
-        bin_path=bin_path,
-    )
-    if ctx.get("error"):
-        print("Error:", ctx["error"], file=sys.stderr)
-        sys.exit(1)
-    context_path = ctx["context_id"]
-    print(f"   Context: {context_path}")
-
-    print("2. Building image (tag: agent-env:helloworld-<ts>)...")
-    tag = f"agent-env:helloworld-{int(time.time())}"
-    out = build_image_from_context(
-        context_id=context_path,
-        tag=tag,
-        bin_path=bin_path,
-    )
-    if out.get("status") != "success":
-        print("Error:", out.get("error", out.get("build_log_summary", out)), file=sys.stderr)
-        sys.exit(1)
-    print(f"   Image: {out.get('image_id', tag)} ({out.get('size_mb', 0):.1f} MB)")
-
-    print("3. Creating container from built image...")
-    r = create_runtime_env(
-        image=tag,
-        dependencies=[],
-        env_vars={},
-        network=False,
-        bin_path=bin_path,
-    )
-    if r.get("error"):
-        print("Error:", r["error"], file=sys.stderr)
-        sys.exit(1)
-    container_id = r["container_id"]
-    print(f"   Container: {container_id[:12]}...")
+        {
+            "id": "build",
+            "tool": "build_image_from_context",
+            "params": {"tag": tag},
+            "bind": {"context_id": "$.context.context_id"},
+        },
+    ]
+    # The whole workflow runs in one adde invocation; later steps take ids from earlier
+    # results via "bind", and cleanup runs even if an earlier step fails.
+    steps = ([] if prebuilt else build_steps) + [
+        {
+            "id": "env",
+            "tool": "create_runtime_env",
+            "params": {"image": tag, "dependencies": [], "env_vars": {}, "network": False},
+        },
+        {
+            "id": "run",
+            "tool": "execute_code_block",
+            "params": {
+                "filename": "run.py",
+                "code_content": "exec(open('/app/main.py').read())",
+                "timeout_sec": 10,
+            },
+            "bind": {"container_id": "$.env.container_id"},
+        },
+        {
+            "id": "logs",
+            "tool": "get_container_logs",
+            "params": {"tail_lines": 20},
+            "bind": {"container_id": "$.env.container_id"},
+        },
+        {
+            "id": "cleanup",
+            "tool": "cleanup_env",
+            "bind": {"container_id": "$.env.container_id"},
+            "always": True,
+        },
+    ]
 
-    try:
-        print("4. Running the app (exec /app/main.py inside container)...")
-        run_script = "exec(open('/app/main.py').read())"
-        exec_out = execute_code_block(
-            container_id=container_id,
-            filename="run.py",
-            code_content=run_script,
-            timeout_sec=10,
-            bin_path=bin_path,
-        )
-        if exec_out.get("error"):
-            print("Error:", exec_out["error"], file=sys.stderr)
-        else:
-            log = exec_out.get("log", {})
-            print("   stdout:", repr(log.get("stdout", "").strip()))
-            print("   stderr:", repr(log.get("stderr", "").strip()) if log.get("stderr") else None)
-            print("   exit_code:", log.get("exit_code"), "| time:", log.get("execution_time"))
-
-        print("5. Fetching container logs (last run)...")
-        logs = get_container_logs(container_id, tail_lines=20, bin_path=bin_path)
-        if logs.get("log"):
-            print("   ", logs["log"].get("stdout", "").strip() or "(empty)")
-    finally:
-        print("6. Cleaning up container...")
-        cleanup_env(container_id, bin_path=bin_path)
-        print("   Done.")
+    print(f"Running hello world pipeline (tag: {tag})...")
+    out = pipeline(steps, bin_path=bin_path)
+    results = out["results"]
+    ctx, build = (None, None) if prebuilt else results[:2]
+    env, run, logs, cleanup = results[-4:]
+
+    if prebuilt:
+        print("1-2. Reusing existing image (files unchanged), skipped build.")
+    if ctx:
+        print(f"1. Prepared build context: {ctx['context_id']}")
+    if build:
+        print(f"2. Built image: {build.get('image_id', tag)} ({build.get('size_mb', 0):.1f} MB)")
+    if env:
+        print(f"3. Created container: {env['container_id'][:12]}...")
+    if run:
+        log = run.get("log", {})
+        print("4. Ran the app (exec /app/main.py inside container)")
+        print("   stdout:", repr(log.get("stdout", "").strip()))
+        print("   stderr:", repr(log.get("stderr", "").strip()) if log.get("stderr") else None)
+        print("   exit_code:", log.get("exit_code"), "| time:", log.get("execution_time"))
+    if logs and logs.get("log"):
+        print("5. Container logs (last run):")
+        print("   ", logs["log"].get("stdout", "").strip() or "(empty)")
+    if cleanup:
+        print("6. Cleaned up container.")
+
+    if out.get("error"):
+        failed = out["results"][out["failed_step"] - 1] or {}
+        print("Error:", out["error"], file=sys.stderr)
+        if failed.get("build_log_summary"):
+            print("   ", failed["build_log_summary"], file=sys.stderr)
+        sys.exit(1)
 
     print("\nHello World run complete.")
 
@@ -12,16 +12,18 @@ import sys
 import time
 from pathlib import Path
 
-# Add the python package to path so we can import adde from the repo
-_repo_root = Path(__file__).resolve().parents[2]
 _example_dir = Path(__file__).resolve().parent
-sys.path.insert(0, str(_repo_root / "python"))
 
-from adde import (
-    build_image_from_path,
-    create_runtime_env,
-    cleanup_env,
-)
+sys.path.insert(0, str(_example_dir.parent))  # examples/, for _adde
+from _adde import adde_bin, use_repo_adde
+
+try:
+    from adde import Session
+except ImportError:
+    # Not installed, or an installed adde without these: import adde from the repo
+    use_repo_adde()
+    from adde import Session
+
 
 # Container listens on 3000; we forward it to this host port
 CONTAINER_PORT = "3000"
@@ -29,38 +31,39 @@ HOST_PORT = "8080"
 
 
 def main() -> None:
-    adde_bin = (
-        _repo_root / "go" / "adde.exe"
-        if sys.platform == "win32"
-        else _repo_root / "go" / "adde"
-    )
-    bin_path = str(adde_bin) if adde_bin.is_file() else None
+    # All calls go through one `adde repl` process (one launch, one Docker client).
+    with Session(adde_bin()) as s:
+        run(s)
+
+    print("\nNode.js Hello World run complete.")
+
 
+def run(s: Session) -> None:
     project_path = str(_example_dir)
     print("1. Building image from path:", project_path)
     tag = f"agent-env:nodejs-helloworld-{int(time.time())}"
-    out = build_image_from_path(
-        path=project_path,
-        tag=tag,
-        bin_path=bin_path,
-    )
-    if out.get("status") != "success":
-        print("Error:", out.get("error", out.get("build_log_summary", out)), file=sys.stderr)
+    try:
+        out = s.call("build_image_from_path", {"path": project_path, "tag": tag})
+    except RuntimeError as e:
+        print("Error:", e, file=sys.stderr)
         sys.exit(1)
     print(f"   Image: {out.get('tag')} ({out.get('size_mb', 0):.1f} MB)")
 
     print("2. Creating container with port forwarding (container 3000 -> host 8080)...")
-    r = create_runtime_env(
-        image=tag,
-        dependencies=[],
-        env_vars={},
-        network=True,
-        port_bindings={CONTAINER_PORT: HOST_PORT},
-        use_image_cmd=True,  # run image CMD (node server.js) so the server starts
-        bin_path=bin_path,
-    )
-    if r.get("error"):
-        print("Error:", r["error"], file=sys.stderr)
+    try:
+        r = s.call(
+            "create_runtime_env",
+            {
+                "image": tag,
+                "dependencies": [],
+                "env_vars": {},
+                "network": True,
+                "port_bindings": {CONTAINER_PORT: HOST_PORT},
+                "use_image_cmd": True,  # run image CMD (node server.js) so the server starts
+            },
+        )
+    except RuntimeError as e:
+        print("Error:", e, file=sys.stderr)
         sys.exit(1)
     container_id = r["container_id"]
     print(f"   Container: {container_id[:12]}...")
@@ -74,11 +77,9 @@ def main() -> None:
         input("   Press Enter to stop the container and exit... ")
     finally:
         print("4. Stopping and removing container...")
-        cleanup_env(container_id, bin_path=bin_path)
+        s.call("cleanup_env", {"container_id": container_id})
         print("   Done.")
 
-    print("\nNode.js Hello World run complete.")
-
 
 if __name__ == "__main__":
     main()
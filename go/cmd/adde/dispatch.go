@@ -0,0 +1,199 @@
+package main
+
+import (
+	"context"
+	"encoding/json"
+	"fmt"
+	"sync"
+
+	"adde/pkg/executor"
+
+	"github.com/docker/docker/client"
+)
+
+// unknownToolError is returned by dispatch for tool names it does not recognise.
+type unknownToolError string
+
+func (e unknownToolError) Error() string {
+	return fmt.Sprintf("unknown tool %q", string(e))
+}
+
+// payloadError wraps a JSON decode failure for a tool's params.
+type payloadError struct {
+	err error
+}
+
+func (e payloadError) Error() string { return e.err.Error() }
+
+func decodeParams(payload []byte, v interface{}) error {
+	if err := json.Unmarshal(payload, v); err != nil {
+		return payloadError{err}
+	}
+	return nil
+}
+
+// dispatcher runs tools against a Docker client created on first use, so that
+// long-lived modes (serve) pay the client handshake once instead of per call.
+type dispatcher struct {
+	mu  sync.Mutex
+	cli *client.Client
+}
+
+func (d *dispatcher) client() (*client.Client, error) {
+	d.mu.Lock()
+	defer d.mu.Unlock()
+	if d.cli == nil {
+		cli, err := client.NewClientWithOpts(client.FromEnv, client.WithAPIVersionNegotiation())
+		if err != nil {
+			return nil, fmt.Errorf("docker client: %w", err)
+		}
+		d.cli = cli
+	}
+	return d.cli, nil
+}
+
+func (d *dispatcher) Close() {
+	d.mu.Lock()
+	defer d.mu.Unlock()
+	if d.cli != nil {
+		d.cli.Close()
+		d.cli = nil
+	}
+}
+
+// features are the optional params reported by ping.
+var features = []string{"code_content_gz"}
+
+type pingResult struct {
+	OK       bool     `json:"ok"`
+	Features []string `json:"features"`
+}
+
+// dispatch decodes payload for tool and runs it. failed reports whether the tool's own
+// result carries an error (the CLI exits 1 in that case). err is set when the payload
+// cannot be decoded (payloadError), the tool is unknown (unknownToolError), or the
+// Docker client cannot be created.
+func (d *dispatcher) dispatch(ctx context.Context, tool string, payload []byte) (result interface{}, failed bool, err error) {
+	// Tools that don't need Docker client
+	switch tool {
+	case "ping":
+		// Liveness check for serve/repl clients; features lists the optional params this
+		// binary understands, so clients only send them to binaries that do.
+		return pingResult{OK: true, Features: features}, false, nil
+	case "prepare_build_context":
+		var p executor.PrepareBuildContextParams
+		if err := decodeParams(payload, &p); err != nil {
+			return nil, false, err
+		}
+		r := executor.PrepareBuildContext(p)
+		return r, r.Error != "", nil
+	case "prepare_build_context_tar":
+		var p executor.PrepareBuildContextTarParams
+		if err := decodeParams(payload, &p); err != nil {
+			return nil, false, err
+		}
+		r := executor.PrepareBuildContextTar(p)
+		return r, r.Error != "", nil
+	case "pipeline":
+		var p pipelineParams
+		if err := decodeParams(payload, &p); err != nil {
+			return nil, false, err
+		}
+		// Step failures are part of the result (results, failed_step, error), not a failed call.
+		return runPipeline(ctx, d, p), false, nil
+	}
+
+	cli, err := d.client()
+	if err != nil {
+		return nil, false, err
+	}
+
+	switch tool {
+	case "pull_image":
+		var p executor.PullImageParams
+		if err := decodeParams(payload, &p); err != nil {
+			return nil, false, err
+		}
+		r := executor.PullImage(ctx, cli, p)
+		return r, r.Error != "", nil
+	case "create_runtime_env":
+		var p executor.CreateRuntimeEnvParams
+		if err := decodeParams(payload, &p); err != nil {
+			return nil, false, err
+		}
+		r := executor.CreateRuntimeEnv(ctx, cli, p)
+		return r, r.Error != "", nil
+	case "execute_code_block":
+		var p executor.ExecuteCodeBlockParams
+		if err := decodeParams(payload, &p); err != nil {
+			return nil, false, err
+		}
+		r := executor.ExecuteCodeBlock(ctx, cli, p)
+		return r, r.Error != "", nil
+	case "get_container_logs":
+		var p executor.GetContainerLogsParams
+		if err := decodeParams(payload, &p); err != nil {
+			return nil, false, err
+		}
+		r := executor.GetContainerLogs(ctx, cli, p)
+		return r, r.Error != "", nil
+	case "cleanup_env":
+		var p executor.CleanupEnvParams
+		if err := decodeParams(payload, &p); err != nil {
+			return nil, false, err
+		}
+		r := executor.CleanupEnv(ctx, cli, p)
+		return r, r.Error != "", nil
+	case "reset_env":
+		var p executor.ResetEnvParams
+		if err := decodeParams(payload, &p); err != nil {
+			return nil, false, err
+		}
+		r := executor.ResetEnv(ctx, cli, p)
+		return r, r.Error != "", nil
+	case "build_image_from_context":
+		var p executor.BuildImageFromContextParams
+		if err := decodeParams(payload, &p); err != nil {
+			return nil, false, err
+		}
+		r := executor.BuildImageFromContext(ctx, cli, p)
+		return r, r.Status == "error" || r.Error != "", nil
+	case "build_image_from_path":
+		var p executor.BuildImageFromPathParams
+		if err := decodeParams(payload, &p); err != nil {
+			return nil, false, err
+		}
+		r := executor.BuildImageFromPath(ctx, cli, p)
+		return r, r.Status == "error" || r.Error != "", nil
+	case "list_agent_images":
+		var p executor.ListAgentImagesParams
+		if err := decodeParams(payload, &p); err != nil {
+			return nil, false, err
+		}
+		r := executor.ListAgentImages(ctx, cli, p)
+		return r, r.Error != "", nil
+	case "list_local_images":
+		var p executor.ListLocalImagesParams
+		if err := decodeParams(payload, &p); err != nil {
+			return nil, false, err
+		}
+		r := executor.ListLocalImages(ctx, cli, p)
+		return r, r.Error != "", nil
+	case "prune_build_cache":
+		var p executor.PruneBuildCacheParams
+		if err := decodeParams(payload, &p); err != nil {
+			return nil, false, err
+		}
+		r := executor.PruneBuildCache(ctx, cli, p)
+		return r, r.Error != "", nil
+	case "delete_image":
+		var p executor.DeleteImageParams
+		if err := decodeParams(payload, &p); err != nil {
+			return nil, false, err
+		}
+		r := executor.DeleteImage(ctx, cli, p)
+		return r, r.Error != "", nil
+	default:
+		return nil, false, unknownToolError(tool)
+	}
+}
@@ -0,0 +1,46 @@
+package main
+
+import (
+	"bufio"
+	"encoding/binary"
+	"encoding/json"
+	"io"
+
+	"adde/pkg/executor"
+)
+
+// logFrameMagic starts a framed get_container_logs response.
+const logFrameMagic = "ADDEFRM1"
+
+// logFrameHeader is the JSON header of a framed log response.
+type logFrameHeader struct {
+	ExitCode      int    `json:"exit_code"`
+	ExecutionTime string `json:"execution_time"`
+}
+
+// wantsLogFrame reports whether a get_container_logs payload asked for "framed": true.
+func wantsLogFrame(payload []byte) bool {
+	var p struct {
+		Framed bool `json:"framed"`
+	}
+	return json.Unmarshal(payload, &p) == nil && p.Framed
+}
+
+// writeLogFrame writes log as a binary frame: the magic, then three sections (JSON
+// header, stdout, stderr), each as a big-endian uint64 length followed by the bytes.
+// stdout and stderr go out raw, so the client can slice them without a JSON unescape.
+func writeLogFrame(w io.Writer, log *executor.LogEntry) error {
+	hdr, err := json.Marshal(logFrameHeader{ExitCode: log.ExitCode, ExecutionTime: log.ExecutionTime})
+	if err != nil {
+		return err
+	}
+	bw := bufio.NewWriter(w)
+	bw.WriteString(logFrameMagic)
+	var n [8]byte
+	for _, section := range []string{string(hdr), log.Stdout, log.Stderr} {
+		binary.BigEndian.PutUint64(n[:], uint64(len(section)))
+		bw.Write(n[:])
+		bw.WriteString(section)
+	}
+	return bw.Flush()
+}
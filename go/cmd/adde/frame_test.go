@@ -0,0 +1,34 @@
+package main
+
+import (
+	"bytes"
+	"encoding/binary"
+	"testing"
+
+	"adde/pkg/executor"
+)
+
+func TestWriteLogFrame(t *testing.T) {
+	var buf bytes.Buffer
+	log := &executor.LogEntry{ExitCode: 3, Stdout: "out\n", Stderr: "", ExecutionTime: "0.50s"}
+	if err := writeLogFrame(&buf, log); err != nil {
+		t.Fatal(err)
+	}
+	b := buf.Bytes()
+	if string(b[:8]) != logFrameMagic {
+		t.Fatalf("bad magic %q", b[:8])
+	}
+	b = b[8:]
+	var sections []string
+	for len(b) > 0 {
+		n := binary.BigEndian.Uint64(b[:8])
+		sections = append(sections, string(b[8:8+n]))
+		b = b[8+n:]
+	}
+	if len(sections) != 3 || sections[0] != `{"exit_code":3,"execution_time":"0.50s"}` || sections[1] != "out\n" || sections[2] != "" {
+		t.Errorf("unexpected sections %q", sections)
+	}
+	if !wantsLogFrame([]byte(`{"container_id":"x","framed":true}`)) || wantsLogFrame([]byte(`{"container_id":"x"}`)) {
+		t.Error("wantsLogFrame mismatch")
+	}
+}
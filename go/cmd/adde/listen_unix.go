@@ -0,0 +1,17 @@
+//go:build !windows
+
+package main
+
+import (
+	"net"
+	"syscall"
+)
+
+// listenPrivate listens on a Unix socket that only the current user can connect to.
+// The socket is created under umask 077 rather than chmodded afterwards, so it is
+// never reachable by others, even briefly.
+func listenPrivate(path string) (net.Listener, error) {
+	old := syscall.Umask(0077)
+	defer syscall.Umask(old)
+	return net.Listen("unix", path)
+}
@@ -0,0 +1,10 @@
+//go:build windows
+
+package main
+
+import "net"
+
+// listenPrivate listens on a Unix socket; access follows the directory's ACL on Windows.
+func listenPrivate(path string) (net.Listener, error) {
+	return net.Listen("unix", path)
+}
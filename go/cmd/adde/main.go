@@ -1,180 +1,85 @@
 package main
 
 import (
-	"bufio"
 	"context"
 	"encoding/json"
+	"errors"
 	"fmt"
+	"io"
 	"os"
 	"time"
 
 	"adde/pkg/executor"
-
-	"github.com/docker/docker/client"
 )
 
 func main() {
 	if len(os.Args) < 2 {
 		fmt.Fprintf(os.Stderr, "usage: adde <tool> [json_payload]\n")
-		fmt.Fprintf(os.Stderr, "  tool: pull_image | create_runtime_env | execute_code_block | get_container_logs | cleanup_env | prepare_build_context | build_image_from_context | build_image_from_path | list_agent_images | prune_build_cache | delete_image\n")
-		fmt.Fprintf(os.Stderr, "  json_payload: JSON object for the tool, or omit to read from stdin\n")
+		fmt.Fprintf(os.Stderr, "  tool: pull_image | create_runtime_env | execute_code_block | get_container_logs | execute_code_block_stream | cleanup_env | reset_env | prepare_build_context | prepare_build_context_tar | build_image_from_context | build_image_from_path | list_agent_images | list_local_images | prune_build_cache | delete_image | pipeline\n")
+		fmt.Fprintf(os.Stderr, "  json_payload: JSON object for the tool, or omit (or \"-\") to read from stdin\n")
+		fmt.Fprintf(os.Stderr, "       adde serve --socket <path>   (daemon: newline-delimited JSON requests on a Unix socket)\n")
+		fmt.Fprintf(os.Stderr, "       adde repl                    (the same requests on stdin, responses on stdout)\n")
 		os.Exit(2)
 	}
 	tool := os.Args[1]
-	var payload string
-	if len(os.Args) >= 3 {
-		payload = os.Args[2]
+	if tool == "serve" {
+		os.Exit(runServe(os.Args[2:]))
+	}
+	if tool == "repl" {
+		os.Exit(runRepl())
+	}
+	var payload []byte
+	if len(os.Args) >= 3 && os.Args[2] != "-" {
+		payload = []byte(os.Args[2])
 	} else {
-		scanner := bufio.NewScanner(os.Stdin)
-		for scanner.Scan() {
-			payload += scanner.Text()
-		}
-		if err := scanner.Err(); err != nil {
+		// Read all of stdin: no argv size limit, and no per-line limit as with bufio.Scanner.
+		data, err := io.ReadAll(os.Stdin)
+		if err != nil {
 			fmt.Fprintf(os.Stderr, "adde: read stdin: %v\n", err)
 			os.Exit(1)
 		}
+		payload = data
 	}
 
 	ctx, cancel := context.WithTimeout(context.Background(), 10*time.Minute)
 	defer cancel()
 
-	// Tools that don't need Docker client
-	switch tool {
-	case "prepare_build_context":
-		var p executor.PrepareBuildContextParams
-		if err := json.Unmarshal([]byte(payload), &p); err != nil {
-			outErr(err)
-			return
-		}
-		result := executor.PrepareBuildContext(p)
-		outJSON(result)
-		if result.Error != "" {
-			os.Exit(1)
-		}
-		return
-	}
+	d := &dispatcher{}
+	defer d.Close()
 
-	cli, err := client.NewClientWithOpts(client.FromEnv, client.WithAPIVersionNegotiation())
-	if err != nil {
-		fmt.Fprintf(os.Stderr, "adde: docker client: %v\n", err)
-		os.Exit(1)
+	if tool == "execute_code_block_stream" {
+		// One-shot only: the output is many lines, not the single response serve/repl expect.
+		code := runExecuteStream(ctx, d, payload, os.Stdout)
+		d.Close()
+		os.Exit(code)
 	}
-	defer cli.Close()
 
-	switch tool {
-	case "pull_image":
-		var p executor.PullImageParams
-		if err := json.Unmarshal([]byte(payload), &p); err != nil {
-			outErr(err)
-			return
-		}
-		result := executor.PullImage(ctx, cli, p)
-		outJSON(result)
-		if result.Error != "" {
-			os.Exit(1)
-		}
-	case "create_runtime_env":
-		var p executor.CreateRuntimeEnvParams
-		if err := json.Unmarshal([]byte(payload), &p); err != nil {
-			outErr(err)
-			return
-		}
-		result := executor.CreateRuntimeEnv(ctx, cli, p)
-		outJSON(result)
-		if result.Error != "" {
-			os.Exit(1)
-		}
-	case "execute_code_block":
-		var p executor.ExecuteCodeBlockParams
-		if err := json.Unmarshal([]byte(payload), &p); err != nil {
-			outErr(err)
-			return
-		}
-		result := executor.ExecuteCodeBlock(ctx, cli, p)
-		outJSON(result)
-		if result.Error != "" {
-			os.Exit(1)
-		}
-	case "get_container_logs":
-		var p executor.GetContainerLogsParams
-		if err := json.Unmarshal([]byte(payload), &p); err != nil {
-			outErr(err)
-			return
-		}
-		result := executor.GetContainerLogs(ctx, cli, p)
-		outJSON(result)
-		if result.Error != "" {
-			os.Exit(1)
-		}
-	case "cleanup_env":
-		var p executor.CleanupEnvParams
-		if err := json.Unmarshal([]byte(payload), &p); err != nil {
-			outErr(err)
-			return
-		}
-		result := executor.CleanupEnv(ctx, cli, p)
-		outJSON(result)
-		if result.Error != "" {
-			os.Exit(1)
-		}
-	case "build_image_from_context":
-		var p executor.BuildImageFromContextParams
-		if err := json.Unmarshal([]byte(payload), &p); err != nil {
-			outErr(err)
-			return
-		}
-		result := executor.BuildImageFromContext(ctx, cli, p)
-		outJSON(result)
-		if result.Status == "error" || result.Error != "" {
-			os.Exit(1)
-		}
-	case "build_image_from_path":
-		var p executor.BuildImageFromPathParams
-		if err := json.Unmarshal([]byte(payload), &p); err != nil {
-			outErr(err)
-			return
-		}
-		result := executor.BuildImageFromPath(ctx, cli, p)
-		outJSON(result)
-		if result.Status == "error" || result.Error != "" {
-			os.Exit(1)
-		}
-	case "list_agent_images":
-		var p executor.ListAgentImagesParams
-		if err := json.Unmarshal([]byte(payload), &p); err != nil {
-			outErr(err)
-			return
-		}
-		result := executor.ListAgentImages(ctx, cli, p)
-		outJSON(result)
-		if result.Error != "" {
-			os.Exit(1)
-		}
-	case "prune_build_cache":
-		var p executor.PruneBuildCacheParams
-		if err := json.Unmarshal([]byte(payload), &p); err != nil {
+	result, failed, err := d.dispatch(ctx, tool, payload)
+	if err != nil {
+		var unknown unknownToolError
+		var bad payloadError
+		switch {
+		case errors.As(err, &unknown):
+			fmt.Fprintf(os.Stderr, "adde: %v\n", err)
+			os.Exit(2)
+		case errors.As(err, &bad):
 			outErr(err)
-			return
-		}
-		result := executor.PruneBuildCache(ctx, cli, p)
-		outJSON(result)
-		if result.Error != "" {
+		default:
+			fmt.Fprintf(os.Stderr, "adde: %v\n", err)
 			os.Exit(1)
 		}
-	case "delete_image":
-		var p executor.DeleteImageParams
-		if err := json.Unmarshal([]byte(payload), &p); err != nil {
-			outErr(err)
-			return
-		}
-		result := executor.DeleteImage(ctx, cli, p)
-		outJSON(result)
-		if result.Error != "" {
+		return
+	}
+	if r, ok := result.(executor.GetContainerLogsResult); ok && r.Log != nil && wantsLogFrame(payload) {
+		if err := writeLogFrame(os.Stdout, r.Log); err != nil {
+			fmt.Fprintf(os.Stderr, "adde: write: %v\n", err)
 			os.Exit(1)
 		}
-	default:
-		fmt.Fprintf(os.Stderr, "adde: unknown tool %q\n", tool)
-		os.Exit(2)
+		return
+	}
+	outJSON(result)
+	if failed {
+		os.Exit(1)
 	}
 }
 
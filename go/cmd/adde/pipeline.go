@@ -0,0 +1,157 @@
+package main
+
+import (
+	"context"
+	"encoding/json"
+	"fmt"
+	"strconv"
+	"strings"
+)
+
+// pipelineStep is one tool call in a pipeline. Bind maps a param name to a reference
+// into an earlier step's result, "$.<step>.<field>[.<field>...]", where <step> is the
+// step's id or "step<N>" (1-based). Always steps run even after an earlier step failed
+// (e.g. cleanup_env); they are skipped if a bound step produced no result.
+type pipelineStep struct {
+	ID     string            `json:"id,omitempty"`
+	Tool   string            `json:"tool"`
+	Params json.RawMessage   `json:"params,omitempty"`
+	Bind   map[string]string `json:"bind,omitempty"`
+	Always bool              `json:"always,omitempty"`
+}
+
+// pipelineParams defines parameters for pipeline.
+type pipelineParams struct {
+	Steps []pipelineStep `json:"steps"`
+}
+
+// pipelineResult holds one result per step (null for skipped steps). FailedStep is the
+// 1-based index of the first step that failed; Error describes it.
+type pipelineResult struct {
+	Results    []interface{} `json:"results"`
+	FailedStep int           `json:"failed_step,omitempty"`
+	Error      string        `json:"error,omitempty"`
+}
+
+// runPipeline runs steps in order in this process, so the whole sequence shares one
+// Docker client. Step failures are reported in the result rather than aborting the call.
+func runPipeline(ctx context.Context, d *dispatcher, p pipelineParams) pipelineResult {
+	res := pipelineResult{Results: make([]interface{}, len(p.Steps))}
+	outputs := make(map[string]interface{})
+	fail := func(i int, msg string) {
+		if res.Error == "" {
+			res.FailedStep = i + 1
+			res.Error = fmt.Sprintf("step %d (%s): %s", i+1, p.Steps[i].Tool, msg)
+		}
+	}
+
+	for i, step := range p.Steps {
+		if res.Error != "" && !step.Always {
+			continue
+		}
+		if step.Tool == "pipeline" {
+			fail(i, "pipelines cannot be nested")
+			continue
+		}
+		params, err := bindParams(step, outputs)
+		if err != nil {
+			// After a failure this is an always step bound to a step that never ran: skip it.
+			fail(i, err.Error())
+			continue
+		}
+		result, failed, err := d.dispatch(ctx, step.Tool, params)
+		if err != nil {
+			res.Results[i] = map[string]string{"error": err.Error()}
+			fail(i, err.Error())
+			continue
+		}
+		res.Results[i] = result
+		generic, err := toGeneric(result)
+		if err != nil {
+			fail(i, err.Error())
+			continue
+		}
+		if failed {
+			msg := "failed"
+			if m, ok := generic.(map[string]interface{}); ok {
+				if e, ok := m["error"].(string); ok && e != "" {
+					msg = e
+				}
+			}
+			fail(i, msg)
+			continue
+		}
+		outputs["step"+strconv.Itoa(i+1)] = generic
+		if step.ID != "" {
+			outputs[step.ID] = generic
+		}
+	}
+	return res
+}
+
+// bindParams returns the step's params with each Bind reference substituted.
+func bindParams(step pipelineStep, outputs map[string]interface{}) ([]byte, error) {
+	if len(step.Bind) == 0 {
+		if len(step.Params) == 0 {
+			return []byte("{}"), nil
+		}
+		return step.Params, nil
+	}
+	params := make(map[string]interface{})
+	if len(step.Params) > 0 {
+		if err := json.Unmarshal(step.Params, &params); err != nil {
+			return nil, err
+		}
+		if params == nil { // "params": null
+			params = make(map[string]interface{})
+		}
+	}
+	for name, ref := range step.Bind {
+		v, err := resolveRef(ref, outputs)
+		if err != nil {
+			return nil, fmt.Errorf("bind %s: %v", name, err)
+		}
+		params[name] = v
+	}
+	return json.Marshal(params)
+}
+
+func resolveRef(ref string, outputs map[string]interface{}) (interface{}, error) {
+	if !strings.HasPrefix(ref, "$.") {
+		return nil, fmt.Errorf("reference %q must start with \"$.\"", ref)
+	}
+	parts := strings.Split(ref[2:], ".")
+	cur, ok := outputs[parts[0]]
+	if !ok {
+		return nil, fmt.Errorf("reference %q: step %q has no result", ref, parts[0])
+	}
+	for _, part := range parts[1:] {
+		switch v := cur.(type) {
+		case map[string]interface{}:
+			if cur, ok = v[part]; !ok {
+				return nil, fmt.Errorf("reference %q: no field %q", ref, part)
+			}
+		case []interface{}:
+			idx, err := strconv.Atoi(part)
+			if err != nil || idx < 0 || idx >= len(v) {
+				return nil, fmt.Errorf("reference %q: bad index %q", ref, part)
+			}
+			cur = v[idx]
+		default:
+			return nil, fmt.Errorf("reference %q: cannot descend into %q", ref, part)
+		}
+	}
+	return cur, nil
+}
+
+// toGeneric round-trips a result through JSON so references see the same field names
+// the client does.
+func toGeneric(v interface{}) (interface{}, error) {
+	raw, err := json.Marshal(v)
+	if err != nil {
+		return nil, err
+	}
+	var out interface{}
+	err = json.Unmarshal(raw, &out)
+	return out, err
+}
@@ -0,0 +1,83 @@
+package main
+
+import (
+	"context"
+	"encoding/json"
+	"os"
+	"testing"
+
+	"adde/pkg/executor"
+)
+
+func TestResolveRef(t *testing.T) {
+	outputs := map[string]interface{}{
+		"build": map[string]interface{}{"image_id": "sha256:abc", "tags": []interface{}{"agent-env:x"}},
+	}
+	if v, err := resolveRef("$.build.image_id", outputs); err != nil || v != "sha256:abc" {
+		t.Errorf("got %v, %v", v, err)
+	}
+	if v, err := resolveRef("$.build.tags.0", outputs); err != nil || v != "agent-env:x" {
+		t.Errorf("got %v, %v", v, err)
+	}
+	for _, ref := range []string{"build.image_id", "$.missing.id", "$.build.nope", "$.build.tags.5"} {
+		if _, err := resolveRef(ref, outputs); err == nil {
+			t.Errorf("expected error for %q", ref)
+		}
+	}
+}
+
+func TestBindParams(t *testing.T) {
+	step := pipelineStep{
+		Tool:   "create_runtime_env",
+		Params: json.RawMessage(`{"network":false}`),
+		Bind:   map[string]string{"image": "$.step1.tag"},
+	}
+	raw, err := bindParams(step, map[string]interface{}{"step1": map[string]interface{}{"tag": "agent-env:t"}})
+	if err != nil {
+		t.Fatal(err)
+	}
+	var got map[string]interface{}
+	if err := json.Unmarshal(raw, &got); err != nil {
+		t.Fatal(err)
+	}
+	if got["image"] != "agent-env:t" || got["network"] != false {
+		t.Errorf("unexpected params %v", got)
+	}
+}
+
+func TestBindParamsNullParams(t *testing.T) {
+	step := pipelineStep{
+		Tool:   "create_runtime_env",
+		Params: json.RawMessage(`null`),
+		Bind:   map[string]string{"image": "$.step1.tag"},
+	}
+	raw, err := bindParams(step, map[string]interface{}{"step1": map[string]interface{}{"tag": "agent-env:t"}})
+	if err != nil {
+		t.Fatal(err)
+	}
+	if string(raw) != `{"image":"agent-env:t"}` {
+		t.Errorf("unexpected params %s", raw)
+	}
+}
+
+func TestRunPipelineStopsAtFailureButRunsAlways(t *testing.T) {
+	d := &dispatcher{}
+	p := pipelineParams{Steps: []pipelineStep{
+		{ID: "ctx", Tool: "prepare_build_context", Params: json.RawMessage(`{"files":{"main.py":"print(1)"}}`)},
+		{Tool: "no_such_tool", Params: json.RawMessage(`{}`)},
+		{Tool: "prepare_build_context", Params: json.RawMessage(`{"files":{"a":"b"}}`)},
+		{Tool: "prepare_build_context", Params: json.RawMessage(`{"files":{"a":"b"}}`), Always: true},
+	}}
+	res := runPipeline(context.Background(), d, p)
+	if res.FailedStep != 2 || res.Error == "" {
+		t.Fatalf("expected step 2 to fail, got %+v", res)
+	}
+	if res.Results[0] == nil || res.Results[2] != nil || res.Results[3] == nil {
+		t.Errorf("unexpected results %+v", res.Results)
+	}
+	for _, i := range []int{0, 3} {
+		if r, ok := res.Results[i].(executor.PrepareBuildContextResult); ok {
+			os.RemoveAll(r.ContextID)
+		}
+	}
+}
@@ -0,0 +1,202 @@
+package main
+
+import (
+	"bufio"
+	"context"
+	"encoding/json"
+	"errors"
+	"flag"
+	"fmt"
+	"io"
+	"net"
+	"os"
+	"path/filepath"
+	"sync"
+	"time"
+)
+
+// serveRequest is one newline-delimited JSON request on a serve connection. Timeout
+// (seconds) bounds the call; when unset it gets defaultRequestTimeout, like a one-shot run.
+type serveRequest struct {
+	ID      int64           `json:"id"`
+	Tool    string          `json:"tool"`
+	Params  json.RawMessage `json:"params"`
+	Timeout float64         `json:"timeout,omitempty"`
+}
+
+// serveResponse answers a serveRequest with the same id. Result is the tool's result
+// (as printed by the one-shot CLI); Failed mirrors the CLI's exit status 1 for a result
+// that carries an error. Error is set instead of Result when the request could not be
+// run at all (bad payload, unknown tool, Docker client failure).
+type serveResponse struct {
+	ID     int64       `json:"id"`
+	Result interface{} `json:"result,omitempty"`
+	Failed bool        `json:"failed,omitempty"`
+	Error  string      `json:"error,omitempty"`
+}
+
+// defaultRequestTimeout bounds a request that does not carry its own timeout.
+const defaultRequestTimeout = 10 * time.Minute
+
+// defaultIdleTimeout is how long serve keeps running with no open connections.
+const defaultIdleTimeout = 10 * time.Minute
+
+// runServe implements "adde serve --socket <path>": a long-lived daemon that accepts
+// connections on a Unix socket and answers newline-delimited JSON requests, reusing
+// one Docker client for every call. It exits once it has had no open connection for
+// --idle-timeout, so a daemon left behind by an old binary does not live forever.
+func runServe(args []string) int {
+	fs := flag.NewFlagSet("serve", flag.ContinueOnError)
+	socketPath := fs.String("socket", "", "path of the Unix socket to listen on")
+	idleTimeout := fs.Duration("idle-timeout", defaultIdleTimeout, "exit after this long with no open connections (0 = never)")
+	if err := fs.Parse(args); err != nil {
+		return 2
+	}
+	if *socketPath == "" {
+		fmt.Fprintf(os.Stderr, "usage: adde serve --socket <path>\n")
+		return 2
+	}
+
+	// A leftover socket file from a daemon that exited uncleanly blocks Listen; only
+	// remove it when nothing answers on it.
+	if conn, err := net.Dial("unix", *socketPath); err == nil {
+		conn.Close()
+		fmt.Fprintf(os.Stderr, "adde: serve: %s is already in use\n", *socketPath)
+		return 1
+	}
+	_ = os.Remove(*socketPath)
+	if err := os.MkdirAll(filepath.Dir(*socketPath), 0700); err != nil {
+		fmt.Fprintf(os.Stderr, "adde: serve: %v\n", err)
+		return 1
+	}
+	ln, err := listenPrivate(*socketPath)
+	if err != nil {
+		fmt.Fprintf(os.Stderr, "adde: serve: %v\n", err)
+		return 1
+	}
+	defer ln.Close()
+	// The idle exit removes the socket file itself, before closing; unlinking on Close
+	// could remove the socket of a daemon started in the meantime.
+	ln.(*net.UnixListener).SetUnlinkOnClose(false)
+
+	d := &dispatcher{}
+	defer d.Close()
+	idle := newIdleTracker(*idleTimeout, func() {
+		_ = os.Remove(*socketPath)
+		ln.Close()
+	})
+	var wg sync.WaitGroup
+	for {
+		conn, err := ln.Accept()
+		if err != nil {
+			if errors.Is(err, net.ErrClosed) {
+				wg.Wait()
+				return 0
+			}
+			fmt.Fprintf(os.Stderr, "adde: serve: accept: %v\n", err)
+			return 1
+		}
+		idle.open()
+		wg.Add(1)
+		go func() {
+			defer wg.Done()
+			defer idle.close()
+			defer conn.Close()
+			serveConn(d, conn, conn)
+		}()
+	}
+}
+
+// idleTracker calls onIdle once no connection has been open for timeout (never if
+// timeout is 0).
+type idleTracker struct {
+	mu      sync.Mutex
+	active  int
+	timeout time.Duration
+	timer   *time.Timer
+}
+
+func newIdleTracker(timeout time.Duration, onIdle func()) *idleTracker {
+	t := &idleTracker{timeout: timeout}
+	if timeout > 0 {
+		t.timer = time.AfterFunc(timeout, onIdle)
+	}
+	return t
+}
+
+func (t *idleTracker) open() {
+	t.mu.Lock()
+	defer t.mu.Unlock()
+	t.active++
+	if t.timer != nil {
+		t.timer.Stop()
+	}
+}
+
+func (t *idleTracker) close() {
+	t.mu.Lock()
+	defer t.mu.Unlock()
+	t.active--
+	if t.active == 0 && t.timer != nil {
+		t.timer.Reset(t.timeout)
+	}
+}
+
+// runRepl implements "adde repl": the serve protocol on stdin/stdout for a single
+// client, so a caller can run a sequence of calls through one process and Docker client.
+func runRepl() int {
+	d := &dispatcher{}
+	defer d.Close()
+	serveConn(d, os.Stdin, os.Stdout)
+	return 0
+}
+
+// serveConn answers requests read from r until EOF, one JSON response line per request line.
+func serveConn(d *dispatcher, r io.Reader, w io.Writer) {
+	br := bufio.NewReader(r)
+	bw := bufio.NewWriter(w)
+	enc := json.NewEncoder(bw)
+	enc.SetEscapeHTML(false)
+	for {
+		// ReadBytes rather than a Scanner: payloads (code_content, files) can exceed
+		// the Scanner's 64 KiB token limit.
+		line, err := br.ReadBytes('\n')
+		if len(line) > 0 {
+			resp := handleRequest(d, line)
+			if encErr := enc.Encode(resp); encErr != nil {
+				return
+			}
+			if flushErr := bw.Flush(); flushErr != nil {
+				return
+			}
+		}
+		if err != nil {
+			return
+		}
+	}
+}
+
+// handleRequest runs one request line. A panic in a tool becomes an error response
+// rather than taking down the daemon and every other client's connection.
+func handleRequest(d *dispatcher, line []byte) (resp serveResponse) {
+	var req serveRequest
+	if err := json.Unmarshal(line, &req); err != nil {
+		return serveResponse{Error: "adde: invalid request: " + err.Error()}
+	}
+	defer func() {
+		if r := recover(); r != nil {
+			resp = serveResponse{ID: req.ID, Error: fmt.Sprintf("adde: %s: internal error: %v", req.Tool, r)}
+		}
+	}()
+	timeout := defaultRequestTimeout
+	if req.Timeout > 0 {
+		timeout = time.Duration(req.Timeout * float64(time.Second))
+	}
+	ctx, cancel := context.WithTimeout(context.Background(), timeout)
+	defer cancel()
+	result, failed, err := d.dispatch(ctx, req.Tool, req.Params)
+	if err != nil {
+		return serveResponse{ID: req.ID, Error: "adde: " + err.Error()}
+	}
+	return serveResponse{ID: req.ID, Result: result, Failed: failed}
+}
@@ -0,0 +1,47 @@
+package main
+
+import (
+	"net"
+	"os"
+	"path/filepath"
+	"testing"
+	"time"
+)
+
+func TestServeExitsWhenIdle(t *testing.T) {
+	sock := filepath.Join(t.TempDir(), "adde.sock")
+	done := make(chan int, 1)
+	go func() { done <- runServe([]string{"--socket", sock, "--idle-timeout", "200ms"}) }()
+
+	var conn net.Conn
+	for i := 0; i < 100; i++ {
+		var err error
+		if conn, err = net.Dial("unix", sock); err == nil {
+			break
+		}
+		time.Sleep(10 * time.Millisecond)
+	}
+	if conn == nil {
+		t.Fatal("serve did not start")
+	}
+	// An open connection keeps the daemon up past the idle timeout.
+	time.Sleep(400 * time.Millisecond)
+	select {
+	case <-done:
+		t.Fatal("serve exited with a connection open")
+	default:
+	}
+	conn.Close()
+
+	select {
+	case code := <-done:
+		if code != 0 {
+			t.Errorf("exit code %d", code)
+		}
+	case <-time.After(5 * time.Second):
+		t.Fatal("serve did not exit after the idle timeout")
+	}
+	if _, err := os.Stat(sock); !os.IsNotExist(err) {
+		t.Errorf("socket file left behind: %v", err)
+	}
+}
@@ -0,0 +1,103 @@
+package main
+
+import (
+	"context"
+	"encoding/json"
+	"fmt"
+	"io"
+	"os"
+	"unicode/utf8"
+
+	"adde/pkg/executor"
+)
+
+// streamChunk is an output line of execute_code_block_stream: a piece of the program's
+// stdout or stderr, in the order it arrived.
+type streamChunk struct {
+	Stream string `json:"stream"` // "stdout" or "stderr"
+	Data   string `json:"data"`
+}
+
+// streamDone is the last line of execute_code_block_stream.
+type streamDone struct {
+	Done          bool   `json:"done"`
+	ExitCode      int    `json:"exit_code"`
+	ExecutionTime string `json:"execution_time,omitempty"`
+	Error         string `json:"error,omitempty"`
+}
+
+// chunkWriter turns each write into a streamChunk line on enc. A UTF-8 sequence split
+// across writes is held back until it is complete, so every chunk is valid text.
+type chunkWriter struct {
+	enc     *json.Encoder
+	stream  string
+	pending []byte
+}
+
+func (w *chunkWriter) Write(p []byte) (int, error) {
+	buf := append(w.pending, p...)
+	cut := len(buf)
+	// Back up to the start of the last rune; hold it if it is not complete yet.
+	for i := len(buf) - 1; i >= 0 && i >= len(buf)-utf8.UTFMax; i-- {
+		if utf8.RuneStart(buf[i]) {
+			if !utf8.FullRune(buf[i:]) {
+				cut = i
+			}
+			break
+		}
+	}
+	w.pending = append([]byte(nil), buf[cut:]...)
+	if cut == 0 {
+		return len(p), nil
+	}
+	if err := w.enc.Encode(streamChunk{Stream: w.stream, Data: string(buf[:cut])}); err != nil {
+		return 0, err
+	}
+	return len(p), nil
+}
+
+// flush writes out anything still held back (an incomplete sequence at end of output).
+func (w *chunkWriter) flush() error {
+	if len(w.pending) == 0 {
+		return nil
+	}
+	err := w.enc.Encode(streamChunk{Stream: w.stream, Data: string(w.pending)})
+	w.pending = nil
+	return err
+}
+
+// runExecuteStream runs execute_code_block_stream: it writes the program's output to out
+// as newline-delimited streamChunk objects while it runs, then one streamDone. Returns
+// the process exit status (1 if the code could not be run).
+func runExecuteStream(ctx context.Context, d *dispatcher, payload []byte, out io.Writer) int {
+	var p executor.ExecuteCodeBlockParams
+	if err := decodeParams(payload, &p); err != nil {
+		outErr(err)
+	}
+	cli, err := d.client()
+	if err != nil {
+		fmt.Fprintf(os.Stderr, "adde: %v\n", err)
+		return 1
+	}
+	enc := json.NewEncoder(out)
+	enc.SetEscapeHTML(false)
+	stdout := &chunkWriter{enc: enc, stream: "stdout"}
+	stderr := &chunkWriter{enc: enc, stream: "stderr"}
+	r := executor.ExecuteCodeBlockStream(ctx, cli, p, stdout, stderr)
+	stdout.flush()
+	stderr.flush()
+
+	done := streamDone{Done: true, Error: r.Error}
+	if r.Log != nil {
+		done.ExitCode = r.Log.ExitCode
+		done.ExecutionTime = r.Log.ExecutionTime
+	}
+	if err := enc.Encode(done); err != nil {
+		fmt.Fprintf(os.Stderr, "adde: encode: %v\n", err)
+		return 1
+	}
+	if r.Error != "" {
+		return 1
+	}
+	return 0
+}
@@ -0,0 +1,34 @@
+package main
+
+import (
+	"bytes"
+	"encoding/json"
+	"strings"
+	"testing"
+)
+
+func TestChunkWriterKeepsRunesWhole(t *testing.T) {
+	var buf bytes.Buffer
+	w := &chunkWriter{enc: json.NewEncoder(&buf), stream: "stdout"}
+	euro := []byte("€") // 3 bytes
+	w.Write(append([]byte("a"), euro[:1]...))
+	w.Write(euro[1:2])
+	w.Write(append(euro[2:], 'b'))
+	w.Write([]byte{0xe2}) // truncated at end of output
+	w.flush()
+
+	var data []string
+	for _, line := range strings.Split(strings.TrimSpace(buf.String()), "\n") {
+		var c streamChunk
+		if err := json.Unmarshal([]byte(line), &c); err != nil {
+			t.Fatal(err)
+		}
+		if c.Stream != "stdout" {
+			t.Errorf("stream %q", c.Stream)
+		}
+		data = append(data, c.Data)
+	}
+	if len(data) != 3 || data[0] != "a" || data[1] != "€b" || data[2] != "�" {
+		t.Errorf("unexpected chunks %q", data)
+	}
+}
@@ -1,7 +1,11 @@
 package executor
 
 import (
+	"archive/tar"
+	"bytes"
+	"compress/gzip"
 	"fmt"
+	"io"
 	"os"
 	"path/filepath"
 	"strings"
@@ -28,20 +32,143 @@ func PrepareBuildContext(p PrepareBuildContextParams) PrepareBuildContextResult
 	if len(p.Files) == 0 {
 		return PrepareBuildContextResult{Error: "files map is required and must not be empty"}
 	}
+	absDir, errMsg := newContextDir()
+	if errMsg != "" {
+		return PrepareBuildContextResult{Error: errMsg}
+	}
+
+	names := make([]string, 0, len(p.Files))
+	// Write each file (support nested paths)
+	for path, content := range p.Files {
+		names = append(names, path)
+		if err := writeContextFile(absDir, path, strings.NewReader(content)); err != nil {
+			os.RemoveAll(absDir)
+			return PrepareBuildContextResult{Error: err.Error()}
+		}
+	}
+
+	if err := finalizeContext(absDir, names); err != nil {
+		os.RemoveAll(absDir)
+		return PrepareBuildContextResult{Error: err.Error()}
+	}
+	return PrepareBuildContextResult{ContextID: absDir}
+}
+
+// PrepareBuildContextTar is PrepareBuildContext for files shipped as one (optionally
+// gzip-compressed) tar archive: entries are streamed to disk in a single pass instead of
+// being decoded one JSON string at a time. Only regular files and directories are
+// extracted. The same .dockerignore and Dockerfile defaults apply.
+func PrepareBuildContextTar(p PrepareBuildContextTarParams) PrepareBuildContextResult {
+	if len(p.Archive) == 0 {
+		return PrepareBuildContextResult{Error: "archive is required and must not be empty"}
+	}
+	var r io.Reader = bytes.NewReader(p.Archive)
+	if bytes.HasPrefix(p.Archive, []byte{0x1f, 0x8b}) {
+		gz, err := gzip.NewReader(r)
+		if err != nil {
+			return PrepareBuildContextResult{Error: fmt.Sprintf("invalid gzip archive: %v", err)}
+		}
+		defer gz.Close()
+		r = gz
+	}
+	absDir, errMsg := newContextDir()
+	if errMsg != "" {
+		return PrepareBuildContextResult{Error: errMsg}
+	}
+
+	var names []string
+	tr := tar.NewReader(r)
+	for {
+		hdr, err := tr.Next()
+		if err == io.EOF {
+			break
+		}
+		if err != nil {
+			os.RemoveAll(absDir)
+			return PrepareBuildContextResult{Error: fmt.Sprintf("invalid tar archive: %v", err)}
+		}
+		switch hdr.Typeflag {
+		case tar.TypeReg:
+			names = append(names, hdr.Name)
+			if err := writeContextFile(absDir, hdr.Name, tr); err != nil {
+				os.RemoveAll(absDir)
+				return PrepareBuildContextResult{Error: err.Error()}
+			}
+		case tar.TypeDir:
+			if full, ok := contextPath(absDir, hdr.Name); ok {
+				if err := os.MkdirAll(full, 0755); err != nil {
+					os.RemoveAll(absDir)
+					return PrepareBuildContextResult{Error: fmt.Sprintf("failed to create dir %q: %v", hdr.Name, err)}
+				}
+			}
+		}
+	}
+	if len(names) == 0 {
+		os.RemoveAll(absDir)
+		return PrepareBuildContextResult{Error: "archive contains no files"}
+	}
+
+	if err := finalizeContext(absDir, names); err != nil {
+		os.RemoveAll(absDir)
+		return PrepareBuildContextResult{Error: err.Error()}
+	}
+	return PrepareBuildContextResult{ContextID: absDir}
+}
+
+// newContextDir creates the temporary build context directory and returns its absolute path.
+func newContextDir() (string, string) {
 	dir, err := os.MkdirTemp("", "adde-build-")
 	if err != nil {
-		return PrepareBuildContextResult{Error: fmt.Sprintf("failed to create temp dir: %v", err)}
+		return "", fmt.Sprintf("failed to create temp dir: %v", err)
 	}
 	absDir, err := filepath.Abs(dir)
 	if err != nil {
 		os.RemoveAll(dir)
-		return PrepareBuildContextResult{Error: fmt.Sprintf("failed to resolve path: %v", err)}
+		return "", fmt.Sprintf("failed to resolve path: %v", err)
+	}
+	return absDir, ""
+}
+
+// contextPath joins name onto absDir, rejecting paths that escape it.
+func contextPath(absDir, name string) (string, bool) {
+	path := filepath.Clean(name)
+	if path == ".." || strings.HasPrefix(path, ".."+string(filepath.Separator)) {
+		return "", false // skip path traversal
+	}
+	return filepath.Join(absDir, path), true
+}
+
+func writeContextFile(absDir, path string, content io.Reader) error {
+	full, ok := contextPath(absDir, path)
+	if !ok {
+		return nil
+	}
+	path = filepath.Clean(path)
+	if err := os.MkdirAll(filepath.Dir(full), 0755); err != nil {
+		return fmt.Errorf("failed to create dir for %q: %v", path, err)
+	}
+	f, err := os.OpenFile(full, os.O_WRONLY|os.O_CREATE|os.O_TRUNC, 0644)
+	if err != nil {
+		return fmt.Errorf("failed to write %q: %v", path, err)
+	}
+	_, err = io.Copy(f, content)
+	if cerr := f.Close(); err == nil {
+		err = cerr
+	}
+	if err != nil {
+		return fmt.Errorf("failed to write %q: %v", path, err)
 	}
+	return nil
+}
 
+// finalizeContext adds the default .dockerignore and, when needed, a generated Dockerfile,
+// based on the names of the files staged into absDir.
+func finalizeContext(absDir string, names []string) error {
 	hasDockerfile := false
 	hasRequirementsTxt := false
 	hasPackageJson := false
-	for name := range p.Files {
+	hasDockerignore := false
+	for _, name := range names {
 		base := filepath.Base(name)
 		if base == "Dockerfile" || strings.HasPrefix(base, "Dockerfile.") {
 			hasDockerfile = true
@@ -52,30 +179,15 @@ func PrepareBuildContext(p PrepareBuildContextParams) PrepareBuildContextResult
 		if base == "package.json" {
 			hasPackageJson = true
 		}
-	}
-
-	// Write each file (support nested paths)
-	for path, content := range p.Files {
-		path = filepath.Clean(path)
-		if path == ".." || strings.HasPrefix(path, ".."+string(filepath.Separator)) {
-			continue // skip path traversal
-		}
-		full := filepath.Join(absDir, path)
-		if err := os.MkdirAll(filepath.Dir(full), 0755); err != nil {
-			os.RemoveAll(absDir)
-			return PrepareBuildContextResult{Error: fmt.Sprintf("failed to create dir for %q: %v", path, err)}
-		}
-		if err := os.WriteFile(full, []byte(content), 0644); err != nil {
-			os.RemoveAll(absDir)
-			return PrepareBuildContextResult{Error: fmt.Sprintf("failed to write %q: %v", path, err)}
+		if filepath.Clean(name) == ".dockerignore" {
+			hasDockerignore = true
 		}
 	}
 
 	// Auto-generate .dockerignore if not in files
-	if _, ok := p.Files[".dockerignore"]; !ok {
+	if !hasDockerignore {
 		if err := os.WriteFile(filepath.Join(absDir, ".dockerignore"), []byte(defaultDockerignore), 0644); err != nil {
-			os.RemoveAll(absDir)
-			return PrepareBuildContextResult{Error: fmt.Sprintf("failed to write .dockerignore: %v", err)}
+			return fmt.Errorf("failed to write .dockerignore: %v", err)
 		}
 	}
 
@@ -83,12 +195,10 @@ func PrepareBuildContext(p PrepareBuildContextParams) PrepareBuildContextResult
 	if !hasDockerfile && (hasRequirementsTxt || hasPackageJson) {
 		dockerfile := standardTemplateDockerfile(hasRequirementsTxt, hasPackageJson)
 		if err := os.WriteFile(filepath.Join(absDir, "Dockerfile"), []byte(dockerfile), 0644); err != nil {
-			os.RemoveAll(absDir)
-			return PrepareBuildContextResult{Error: fmt.Sprintf("failed to write generated Dockerfile: %v", err)}
+			return fmt.Errorf("failed to write generated Dockerfile: %v", err)
 		}
 	}
-
-	return PrepareBuildContextResult{ContextID: absDir}
+	return nil
 }
 
 func standardTemplateDockerfile(python, node bool) string {
@@ -0,0 +1,67 @@
+package executor
+
+import (
+	"archive/tar"
+	"bytes"
+	"compress/gzip"
+	"os"
+	"path/filepath"
+	"testing"
+)
+
+func tarGz(t *testing.T, files map[string]string) []byte {
+	t.Helper()
+	var buf bytes.Buffer
+	gz := gzip.NewWriter(&buf)
+	tw := tar.NewWriter(gz)
+	for name, content := range files {
+		hdr := &tar.Header{Name: name, Mode: 0644, Size: int64(len(content)), Typeflag: tar.TypeReg}
+		if err := tw.WriteHeader(hdr); err != nil {
+			t.Fatal(err)
+		}
+		if _, err := tw.Write([]byte(content)); err != nil {
+			t.Fatal(err)
+		}
+	}
+	if err := tw.Close(); err != nil {
+		t.Fatal(err)
+	}
+	if err := gz.Close(); err != nil {
+		t.Fatal(err)
+	}
+	return buf.Bytes()
+}
+
+func TestPrepareBuildContextTar(t *testing.T) {
+	r := PrepareBuildContextTar(PrepareBuildContextTarParams{Archive: tarGz(t, map[string]string{
+		"requirements.txt": "requests",
+		"src/main.py":      "print(1)",
+		"../escape.txt":    "nope",
+	})})
+	if r.Error != "" {
+		t.Fatal(r.Error)
+	}
+	defer os.RemoveAll(r.ContextID)
+
+	for _, name := range []string{"requirements.txt", "src/main.py", ".dockerignore", "Dockerfile"} {
+		if _, err := os.Stat(filepath.Join(r.ContextID, name)); err != nil {
+			t.Errorf("expected %s in context: %v", name, err)
+		}
+	}
+	if got, _ := os.ReadFile(filepath.Join(r.ContextID, "src/main.py")); string(got) != "print(1)" {
+		t.Errorf("src/main.py = %q", got)
+	}
+	if _, err := os.Stat(filepath.Join(filepath.Dir(r.ContextID), "escape.txt")); err == nil {
+		t.Error("path traversal entry was extracted")
+	}
+}
+
+func TestPrepareBuildContextTarRejectsBadArchive(t *testing.T) {
+	if r := PrepareBuildContextTar(PrepareBuildContextTarParams{}); r.Error == "" {
+		t.Error("expected error for empty archive")
+	}
+	if r := PrepareBuildContextTar(PrepareBuildContextTarParams{Archive: []byte("not a tar")}); r.Error == "" {
+		os.RemoveAll(r.ContextID)
+		t.Error("expected error for invalid archive")
+	}
+}
@@ -3,9 +3,11 @@ package executor
 import (
 	"archive/tar"
 	"bytes"
+	"compress/gzip"
 	"context"
 	"encoding/json"
 	"fmt"
+	"io"
 	"path"
 	"strings"
 	"time"
@@ -19,13 +21,27 @@ const lastRunPath = ".adde_last_run.json"
 // ExecuteCodeBlock writes code into the container via put_archive and runs it with a timeout.
 // Returns the structured log (stdout/stderr/exit_code/execution_time) for the refiner agent.
 func ExecuteCodeBlock(ctx context.Context, cli *client.Client, p ExecuteCodeBlockParams) ExecuteCodeBlockResult {
+	return ExecuteCodeBlockStream(ctx, cli, p, nil, nil)
+}
+
+// ExecuteCodeBlockStream is ExecuteCodeBlock that also copies the program's output to
+// stdout and stderr (when non-nil) as it arrives. The result's log still holds the full output.
+func ExecuteCodeBlockStream(ctx context.Context, cli *client.Client, p ExecuteCodeBlockParams, stdout, stderr io.Writer) ExecuteCodeBlockResult {
 	timeout := 30
 	if p.TimeoutSec > 0 {
 		timeout = p.TimeoutSec
 	}
 
+	code := p.CodeContent
+	if len(p.CodeContentGz) > 0 {
+		var err error
+		if code, err = gunzipString(p.CodeContentGz); err != nil {
+			return ExecuteCodeBlockResult{Error: fmt.Sprintf("invalid code_content_gz: %v", err)}
+		}
+	}
+
 	// Safe file transfer: build tar with only the file content (no shell interpolation)
-	tarBuf, err := buildTarStream(p.Filename, p.CodeContent)
+	tarBuf, err := buildTarStream(p.Filename, code)
 	if err != nil {
 		return ExecuteCodeBlockResult{Error: err.Error()}
 	}
@@ -39,15 +55,23 @@ func ExecuteCodeBlock(ctx context.Context, cli *client.Client, p ExecuteCodeBloc
 	fp := path.Join(WorkspacePathInsideContainer, p.Filename)
 	cmd := runCommandForFile(fp, p.Filename)
 
-	stdout, stderr, exitCode, dur, execErr := runExec(ctx, cli, p.ContainerID, cmd, timeout)
+	var outBuf, errBuf bytes.Buffer
+	var outW, errW io.Writer = &outBuf, &errBuf
+	if stdout != nil {
+		outW = io.MultiWriter(&outBuf, stdout)
+	}
+	if stderr != nil {
+		errW = io.MultiWriter(&errBuf, stderr)
+	}
+	exitCode, dur, execErr := runExecTo(ctx, cli, p.ContainerID, cmd, timeout, outW, errW)
 	if execErr != nil {
 		return ExecuteCodeBlockResult{Error: execErr.Error()}
 	}
 
 	logEntry := &LogEntry{
 		ExitCode:      exitCode,
-		Stdout:        stdout,
-		Stderr:        stderr,
+		Stdout:        outBuf.String(),
+		Stderr:        errBuf.String(),
 		ExecutionTime: formatDuration(dur),
 	}
 
@@ -57,6 +81,19 @@ func ExecuteCodeBlock(ctx context.Context, cli *client.Client, p ExecuteCodeBloc
 	return ExecuteCodeBlockResult{Log: logEntry}
 }
 
+func gunzipString(data []byte) (string, error) {
+	zr, err := gzip.NewReader(bytes.NewReader(data))
+	if err != nil {
+		return "", err
+	}
+	defer zr.Close()
+	var sb strings.Builder
+	if _, err := io.Copy(&sb, zr); err != nil {
+		return "", err
+	}
+	return sb.String(), nil
+}
+
 func buildTarStream(filename, content string) (*bytes.Buffer, error) {
 	var buf bytes.Buffer
 	tw := tar.NewWriter(&buf)
@@ -0,0 +1,15 @@
+package executor
+
+import (
+	"context"
+	"strings"
+	"testing"
+)
+
+func TestExecuteCodeBlockRejectsInvalidCodeGz(t *testing.T) {
+	// Checked before the Docker client is used, so nil is fine here.
+	r := ExecuteCodeBlock(context.Background(), nil, ExecuteCodeBlockParams{ContainerID: "cid", Filename: "main.py", CodeContentGz: []byte("not gzip")})
+	if !strings.HasPrefix(r.Error, "invalid code_content_gz") {
+		t.Fatalf("expected an invalid code_content_gz error, got %+v", r)
+	}
+}
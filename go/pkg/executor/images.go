@@ -54,6 +54,29 @@ func ListAgentImages(ctx context.Context, cli *client.Client, p ListAgentImagesP
 	return ListAgentImagesResult{Images: out}
 }
 
+// ListLocalImages lists the references (tags and repo digests) of all local images, so a
+// caller can tell whether an image needs pulling without contacting the registry.
+func ListLocalImages(ctx context.Context, cli *client.Client, p ListLocalImagesParams) ListLocalImagesResult {
+	list, err := cli.ImageList(ctx, types.ImageListOptions{})
+	if err != nil {
+		return ListLocalImagesResult{Error: err.Error()}
+	}
+	out := ListLocalImagesResult{Tags: []string{}}
+	for _, im := range list {
+		for _, tag := range im.RepoTags {
+			if tag != "<none>:<none>" {
+				out.Tags = append(out.Tags, tag)
+			}
+		}
+		for _, digest := range im.RepoDigests {
+			if digest != "<none>@<none>" {
+				out.Digests = append(out.Digests, digest)
+			}
+		}
+	}
+	return out
+}
+
 // DeleteImage removes a Docker image by tag or ID. When AgentEnvOnly is true, only tags with prefix "agent-env:" are allowed.
 func DeleteImage(ctx context.Context, cli *client.Client, p DeleteImageParams) DeleteImageResult {
 	img := strings.TrimSpace(p.Image)
@@ -0,0 +1,40 @@
+package executor
+
+import (
+	"context"
+	"fmt"
+	"time"
+
+	"github.com/docker/docker/api/types/container"
+	"github.com/docker/docker/client"
+)
+
+// ResetEnv readies an existing container for reuse (e.g. from a client-side pool): it is
+// restarted, which kills every process the last task left behind, and /workspace is
+// emptied, including the last run log. Other changes to the container's filesystem
+// (installed packages, files in /tmp, ...) survive; only a new container undoes those.
+func ResetEnv(ctx context.Context, cli *client.Client, p ResetEnvParams) ResetEnvResult {
+	if p.ContainerID == "" {
+		return ResetEnvResult{Error: "container_id is required"}
+	}
+	ctx, cancel := context.WithTimeout(ctx, 30*time.Second)
+	defer cancel()
+
+	// No grace period: the keep-alive sleep ignores SIGTERM as PID 1, so it would only delay the kill.
+	timeoutSec := 0
+	if err := cli.ContainerRestart(ctx, p.ContainerID, container.StopOptions{Timeout: &timeoutSec}); err != nil {
+		return ResetEnvResult{Error: err.Error()}
+	}
+
+	// Remove everything under the workspace, dotfiles included, but not the mount point itself.
+	cmd := []string{"sh", "-c", "rm -rf " + WorkspacePathInsideContainer + "/* " +
+		WorkspacePathInsideContainer + "/.[!.]* " + WorkspacePathInsideContainer + "/..?*"}
+	_, stderr, exitCode, _, err := runExec(ctx, cli, p.ContainerID, cmd, 20)
+	if err != nil {
+		return ResetEnvResult{Error: err.Error()}
+	}
+	if exitCode != 0 {
+		return ResetEnvResult{Error: fmt.Sprintf("workspace cleanup failed (exit %d): %s", exitCode, stderr)}
+	}
+	return ResetEnvResult{OK: true}
+}
@@ -23,6 +23,8 @@ type ExecuteCodeBlockParams struct {
 	Filename   string `json:"filename"`
 	CodeContent string `json:"code_content"`
 	TimeoutSec int    `json:"timeout_sec,omitempty"` // default 30
+	// CodeContentGz is code_content gzip-compressed (base64 in JSON); when set it replaces CodeContent.
+	CodeContentGz []byte `json:"code_content_gz,omitempty"`
 }
 
 // ExecuteCodeBlockResult is the return value of execute_code_block; includes log for refiner feedback loop.
@@ -35,6 +37,8 @@ type ExecuteCodeBlockResult struct {
 type GetContainerLogsParams struct {
 	ContainerID string `json:"container_id"`
 	TailLines   int    `json:"tail_lines,omitempty"` // 0 = all
+	// Framed asks the one-shot CLI for a binary frame instead of JSON (see cmd/adde/frame.go).
+	Framed bool `json:"framed,omitempty"`
 }
 
 // LogEntry is the structured feedback for the refiner agent (per spec §3.B).
@@ -73,6 +77,17 @@ type PullImageResult struct {
 	Error string `json:"error,omitempty"`
 }
 
+// ResetEnvParams defines parameters for reset_env.
+type ResetEnvParams struct {
+	ContainerID string `json:"container_id"`
+}
+
+// ResetEnvResult is the return value of reset_env.
+type ResetEnvResult struct {
+	OK    bool   `json:"ok"`
+	Error string `json:"error,omitempty"`
+}
+
 // ---- Image Builder & Factory ----
 
 // PrepareBuildContextParams defines parameters for prepare_build_context.
@@ -81,7 +96,13 @@ type PrepareBuildContextParams struct {
 	ContextID string           `json:"context_id"` // optional; if empty, a new ID is generated
 }
 
-// PrepareBuildContextResult is the return value of prepare_build_context.
+// PrepareBuildContextTarParams defines parameters for prepare_build_context_tar.
+type PrepareBuildContextTarParams struct {
+	Archive   []byte `json:"archive"`    // tar of the context files, optionally gzip-compressed (base64 in JSON)
+	ContextID string `json:"context_id"` // optional; if empty, a new ID is generated
+}
+
+// PrepareBuildContextResult is the return value of prepare_build_context and prepare_build_context_tar.
 type PrepareBuildContextResult struct {
 	ContextID string `json:"context_id,omitempty"` // absolute path to build context dir
 	Error     string `json:"error,omitempty"`
@@ -132,6 +153,17 @@ type AgentImageEntry struct {
 	Created  string   `json:"created,omitempty"`
 }
 
+// ListLocalImagesParams defines parameters for list_local_images (none yet).
+type ListLocalImagesParams struct{}
+
+// ListLocalImagesResult is the return value of list_local_images: every tag and digest
+// reference present in the local image store.
+type ListLocalImagesResult struct {
+	Tags    []string `json:"tags"`
+	Digests []string `json:"digests,omitempty"` // e.g. busybox@sha256:...
+	Error   string   `json:"error,omitempty"`
+}
+
 // PruneBuildCacheParams defines parameters for prune_build_cache.
 type PruneBuildCacheParams struct {
 	OlderThanHrs int `json:"older_than_hrs,omitempty"` // 0 = prune all unused
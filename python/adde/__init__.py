@@ -5,40 +5,68 @@ Python client for the ADDE Go CLI. Use from agent code to:
 - pull_image: pull an image from the registry (call before create_runtime_env if needed)
 - create_runtime_env: provision a container with workspace mount and limits
 - execute_code_block: write code into the container and run it (returns structured log)
+- execute_code_block_stream: the same, yielding stdout/stderr chunks as they arrive
 - get_container_logs: fetch the last execution's stdout/stderr/exit_code/execution_time
+  (framed=True returns a LogResult with undecoded stdout/stderr)
 - cleanup_env: stop and remove the container
+- reset_env: restart a container and empty its workspace for reuse
+- pipeline: run several tool calls in one adde invocation, binding results between steps
+- batch: same, as a list of (tool, params) calls; returns the results and raises on failure
 - prepare_build_context: stage files into a temp dir for Docker build (optional Dockerfile)
+- prepare_build_context_tar: same, with the files shipped as one gzipped tar (dict or directory)
 - build_image_from_context: run docker build from context; returns image_id for create_runtime_env
 - build_image_from_path: build from an existing directory (e.g. cloned repo) that has a Dockerfile
 - list_agent_images: list custom images (agent-env:...)
 - prune_build_cache: clean up build cache
 - delete_image: remove a Docker image by tag or ID
+
+Session runs several calls through one `adde repl` process; ContainerPool keeps warm
+containers for create_runtime_env(pool=...) / cleanup_env(pool=...).
+
+adde.async_client has the same tools as coroutines, for running independent calls
+concurrently (e.g. gather_pulls).
 """
 
 from .client import (
+    LogResult,
+    Session,
+    batch,
     build_image_from_context,
     build_image_from_path,
     cleanup_env,
     create_runtime_env,
     delete_image,
     execute_code_block,
+    execute_code_block_stream,
     get_container_logs,
     list_agent_images,
+    pipeline,
     prepare_build_context,
+    prepare_build_context_tar,
     prune_build_cache,
     pull_image,
+    reset_env,
 )
+from .pool import ContainerPool
 
 __all__ = [
+    "ContainerPool",
+    "LogResult",
+    "Session",
+    "batch",
     "build_image_from_context",
     "build_image_from_path",
     "cleanup_env",
     "create_runtime_env",
     "delete_image",
     "execute_code_block",
+    "execute_code_block_stream",
     "get_container_logs",
     "list_agent_images",
+    "pipeline",
     "prepare_build_context",
+    "prepare_build_context_tar",
     "prune_build_cache",
     "pull_image",
+    "reset_env",
 ]
@@ -0,0 +1,296 @@
+"""
+ADDE asyncio client – the adde.client tools as coroutines, for running independent
+calls concurrently (pull several images, provision N containers, ...).
+
+Each call runs the adde binary with asyncio.create_subprocess_exec (params on
+stdin), so concurrent calls overlap on the event loop without tying up a thread
+each. Parameters, return values and errors match adde.client, with two gaps:
+build_image_from_context always builds (no build index, no force), and there is
+no async ContainerPool.
+
+    results = await asyncio.gather(pull_image("busybox"), pull_image("python:3.11-slim"))
+    # or: await gather_pulls(["busybox", "python:3.11-slim"])
+"""
+
+import asyncio
+import os
+import subprocess
+import time
+from typing import Any, Optional, Union
+
+from .client import (
+    _COMPRESS_THRESHOLD,
+    LogResult,
+    _batch_results,
+    _batch_steps,
+    _code_params,
+    _encode_params,
+    _find_adde,
+    _image_cache,
+    _image_cache_lock,
+    _image_refs,
+    _invalidate_image_cache,
+    _loads,
+    _parse_log_frame,
+    _tar_context,
+    _text,
+)
+
+
+async def _acall(
+    tool: str,
+    params: Union[dict, bytes],
+    bin_path: Optional[str] = None,
+    timeout: int = 120,
+) -> dict:
+    return _loads(await _arun_tool(bin_path or _find_adde(), tool, params, timeout))
+
+
+async def _arun_tool(bin_: str, tool: str, params: Union[dict, bytes], timeout: int) -> bytes:
+    """Run one adde process for tool and return its stdout; raises RuntimeError on failure."""
+    proc = await asyncio.create_subprocess_exec(
+        bin_,
+        tool,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        # As in adde.client._run: posix_spawn and no per-fd close sweep; our fds are non-inheritable.
+        close_fds=False,
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(_encode_params(params)), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise subprocess.TimeoutExpired([bin_, tool], timeout)
+    except BaseException:
+        proc.kill()
+        raise
+    if proc.returncode != 0:
+        err = _text(stderr) or _text(stdout) or f"adde {tool} failed"
+        raise RuntimeError(err)
+    return stdout
+
+
+async def pull_image(image: str, force: bool = False, bin_path: Optional[str] = None) -> dict[str, Any]:
+    """Async adde.client.pull_image."""
+    refs = _image_refs(image.strip())
+    if refs and not force:
+        try:
+            local = await _local_images(bin_path)
+        except RuntimeError:
+            local = frozenset()  # e.g. an adde without list_local_images: just pull
+        if not refs.isdisjoint(local):
+            return {"ok": True, "cached": True}
+    return await _acall("pull_image", {"image": image}, bin_path=bin_path)
+
+
+async def _local_images(bin_path: Optional[str]) -> frozenset:
+    """adde.client._local_images, kept in the same image cache (and cleared with it)."""
+    key = ("_async_local_images", bin_path)
+    now = time.monotonic()
+    with _image_cache_lock:
+        hit = _image_cache.get(key)
+    if hit is not None and hit[0] > now:
+        return hit[1]
+    out = await _acall("list_local_images", {}, bin_path=bin_path)
+    local = frozenset(out.get("tags") or ()) | frozenset(out.get("digests") or ())
+    with _image_cache_lock:
+        _image_cache[key] = (now + 5.0, local)
+    return local
+
+
+async def gather_pulls(
+    images: list[str], bin_path: Optional[str] = None
+) -> list[dict[str, Any]]:
+    """Pulls all images concurrently; results are in the order of images."""
+    return await asyncio.gather(*(pull_image(i, bin_path=bin_path) for i in images))
+
+
+async def create_runtime_env(
+    image: str,
+    dependencies: Optional[list[str]] = None,
+    env_vars: Optional[dict[str, str]] = None,
+    network: bool = False,
+    port_bindings: Optional[dict[str, str]] = None,
+    use_image_cmd: bool = False,
+    bin_path: Optional[str] = None,
+) -> dict[str, Any]:
+    """Async adde.client.create_runtime_env."""
+    params: dict[str, Any] = {
+        "image": image,
+        "dependencies": dependencies or [],
+        "env_vars": env_vars or {},
+        "network": network,
+    }
+    if port_bindings:
+        params["port_bindings"] = port_bindings
+    if use_image_cmd:
+        params["use_image_cmd"] = True
+    return await _acall("create_runtime_env", params, bin_path=bin_path)
+
+
+async def execute_code_block(
+    container_id: str,
+    filename: str,
+    code_content: str,
+    timeout_sec: int = 30,
+    bin_path: Optional[str] = None,
+) -> dict[str, Any]:
+    """Async adde.client.execute_code_block."""
+    bin_ = bin_path or _find_adde()
+    if len(code_content) > _COMPRESS_THRESHOLD:
+        # Compressing may first ping bin_ for support (once per binary): keep it off the loop.
+        code = await asyncio.to_thread(_code_params, code_content, bin_)
+    else:
+        code = _code_params(code_content, bin_)
+    params = {
+        "container_id": container_id,
+        "filename": filename,
+        "timeout_sec": timeout_sec,
+        **code,
+    }
+    return await _acall("execute_code_block", params, bin_path=bin_)
+
+
+async def get_container_logs(
+    container_id: str,
+    tail_lines: int = 0,
+    framed: bool = False,
+    bin_path: Optional[str] = None,
+) -> Union[dict[str, Any], LogResult]:
+    """Async adde.client.get_container_logs."""
+    params: dict[str, Any] = {"container_id": container_id, "tail_lines": tail_lines}
+    if not framed:
+        return await _acall("get_container_logs", params, bin_path=bin_path)
+    params["framed"] = True
+    return _parse_log_frame(await _arun_tool(bin_path or _find_adde(), "get_container_logs", params, 120))
+
+
+async def cleanup_env(container_id: str, bin_path: Optional[str] = None) -> dict[str, Any]:
+    """Async adde.client.cleanup_env."""
+    return await _acall("cleanup_env", {"container_id": container_id}, bin_path=bin_path)
+
+
+async def reset_env(container_id: str, bin_path: Optional[str] = None) -> dict[str, Any]:
+    """Async adde.client.reset_env."""
+    return await _acall("reset_env", {"container_id": container_id}, bin_path=bin_path)
+
+
+async def pipeline(
+    steps: list[dict[str, Any]],
+    bin_path: Optional[str] = None,
+    timeout: int = 900,
+) -> dict[str, Any]:
+    """Async adde.client.pipeline."""
+    try:
+        return await _acall("pipeline", {"steps": steps}, bin_path=bin_path, timeout=timeout)
+    finally:
+        _invalidate_image_cache()  # steps may have built or deleted images
+
+
+async def batch(
+    calls: list[Union[tuple, dict[str, Any]]],
+    bin_path: Optional[str] = None,
+    timeout: int = 900,
+) -> list[Optional[dict[str, Any]]]:
+    """Async adde.client.batch."""
+    return _batch_results(await pipeline(_batch_steps(calls), bin_path=bin_path, timeout=timeout))
+
+
+# ---- Image Builder & Factory ----
+
+
+async def prepare_build_context(
+    files: dict[str, str],
+    context_id: Optional[str] = None,
+    bin_path: Optional[str] = None,
+) -> dict[str, Any]:
+    """Async adde.client.prepare_build_context."""
+    params: dict[str, Any] = {"files": files}
+    if context_id is not None:
+        params["context_id"] = context_id
+    return await _acall("prepare_build_context", params, bin_path=bin_path)
+
+
+async def prepare_build_context_tar(
+    files: Union[dict[str, Union[str, bytes]], str, os.PathLike],
+    context_id: Optional[str] = None,
+    bin_path: Optional[str] = None,
+) -> dict[str, Any]:
+    """Async adde.client.prepare_build_context_tar."""
+    params: dict[str, Any] = {"archive": _tar_context(files)}
+    if context_id is not None:
+        params["context_id"] = context_id
+    return await _acall("prepare_build_context_tar", params, bin_path=bin_path)
+
+
+async def build_image_from_context(
+    context_id: str,
+    tag: str,
+    build_args: Optional[dict[str, str]] = None,
+    bin_path: Optional[str] = None,
+) -> dict[str, Any]:
+    """Async adde.client.build_image_from_context."""
+    params: dict[str, Any] = {"context_id": context_id, "tag": tag}
+    if build_args:
+        params["build_args"] = build_args
+    out = await _acall("build_image_from_context", params, bin_path=bin_path, timeout=600)
+    _invalidate_image_cache()
+    return out
+
+
+async def build_image_from_path(
+    path: str,
+    tag: str,
+    build_args: Optional[dict[str, str]] = None,
+    bin_path: Optional[str] = None,
+) -> dict[str, Any]:
+    """Async adde.client.build_image_from_path."""
+    params: dict[str, Any] = {"path": path, "tag": tag}
+    if build_args:
+        params["build_args"] = build_args
+    out = await _acall("build_image_from_path", params, bin_path=bin_path, timeout=600)
+    _invalidate_image_cache()
+    return out
+
+
+async def list_agent_images(
+    filter_tag: Optional[str] = None,
+    bin_path: Optional[str] = None,
+) -> dict[str, Any]:
+    """Async adde.client.list_agent_images."""
+    params: dict[str, Any] = {}
+    if filter_tag is not None:
+        params["filter_tag"] = filter_tag
+    return await _acall("list_agent_images", params, bin_path=bin_path)
+
+
+async def prune_build_cache(
+    older_than_hrs: int = 0,
+    bin_path: Optional[str] = None,
+) -> dict[str, Any]:
+    """Async adde.client.prune_build_cache."""
+    params: dict[str, Any] = {}
+    if older_than_hrs > 0:
+        params["older_than_hrs"] = older_than_hrs
+    return await _acall("prune_build_cache", params, bin_path=bin_path)
+
+
+async def delete_image(
+    image: str,
+    force: bool = False,
+    bin_path: Optional[str] = None,
+) -> dict[str, Any]:
+    """Async adde.client.delete_image (only agent-env: tags; raises ValueError otherwise)."""
+    if not image.strip().startswith("agent-env:"):
+        raise ValueError(
+            'only agent-created images can be deleted (image must start with "agent-env:"); '
+            "use list_agent_images to see allowed tags"
+        )
+    params: dict[str, Any] = {"image": image, "agent_env_only": True}
+    if force:
+        params["force"] = True
+    out = await _acall("delete_image", params, bin_path=bin_path)
+    _invalidate_image_cache()
+    return out
@@ -1,61 +1,821 @@
 """
-ADDE Python client – invokes the Go adde CLI via subprocess and returns parsed JSON.
+ADDE Python client – invokes the Go adde CLI and returns parsed JSON.
+
+Calls go to a long-lived `adde serve` daemon over a Unix socket when one can be
+started (spawned lazily on first use); otherwise, or when ADDE_NO_DAEMON=1, each
+call runs the adde binary as a subprocess with the JSON params on stdin.
 """
 
+import base64
+import functools
+import gzip
+import hashlib
+import io
 import json
 import os
+import select
+import selectors
+import shutil
+import socket
+import stat
+import struct
 import subprocess
+import tarfile
+import tempfile
+import threading
+import time
 from pathlib import Path
-from typing import Any, Optional
+from typing import IO, TYPE_CHECKING, Any, Callable, Iterator, NamedTuple, Optional, TypeVar, Union, cast
+
+if TYPE_CHECKING:
+    from .pool import ContainerPool
+
+try:
+    import msgspec
+except ImportError:  # optional: pip install adde[fast]
+    msgspec = None  # type: ignore[assignment]
+
+try:
+    import orjson
+except ImportError:  # optional alternative to msgspec
+    orjson = None  # type: ignore[assignment]
+
+# JSON (de)serialization on bytes: msgspec when installed, else orjson, else the
+# standard library. All produce the same compact JSON. ADDE_JSON_BACKEND
+# (msgspec, orjson or stdlib) picks one explicitly, e.g. to compare them.
+_JSON_BACKEND = os.environ.get("ADDE_JSON_BACKEND", "").strip().lower()
+if _JSON_BACKEND not in ("", "msgspec", "orjson", "stdlib"):
+    raise ValueError(f"ADDE_JSON_BACKEND must be msgspec, orjson or stdlib, not {_JSON_BACKEND!r}")
+if _JSON_BACKEND in ("msgspec", "orjson") and globals()[_JSON_BACKEND] is None:
+    raise ImportError(f"ADDE_JSON_BACKEND={_JSON_BACKEND} but {_JSON_BACKEND} is not installed")
+
+_dumps: Callable[[Any], bytes]
+_loads: Callable[[Union[bytes, bytearray, str]], Any]
+if msgspec is not None and _JSON_BACKEND in ("", "msgspec"):
+    _dumps = msgspec.json.Encoder().encode
+    _loads = msgspec.json.Decoder().decode
+elif orjson is not None and _JSON_BACKEND in ("", "orjson"):
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+else:
+    # One compact encoder for every call rather than json.dumps' per-call setup and
+    # ", "/": " separators; non-ASCII goes out as UTF-8 instead of \u escapes.
+    _ENCODE = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+
+    def _stdlib_dumps(obj: Any) -> bytes:
+        return _ENCODE(obj).encode()
+
+    _dumps = _stdlib_dumps
+    _loads = json.loads
 
 # Default path to adde binary; override with ADDE_BIN or pass bin_path=...
 _ADDE_BIN = os.environ.get("ADDE_BIN", "adde")
 
+_REPO_ROOT = Path(__file__).resolve().parents[2]
+
+_PIPE_BUF = getattr(select, "PIPE_BUF", 512)
+
 
 def _find_adde() -> str:
-    """Resolve adde binary: env ADDE_BIN, or 'adde' in PATH, or go/adde.exe in repo."""
-    if os.environ.get("ADDE_BIN"):
-        return os.environ["ADDE_BIN"]
-    root = Path(__file__).resolve().parents[2]
-    for name in ("adde.exe", "adde"):
-        cand = root / "go" / name
-        if cand.is_file():
-            return str(cand)
-    return "adde"
+    """
+    Resolve adde binary: env ADDE_BIN, or 'adde' in PATH, or go/adde(.exe) in repo.
 
+    The lookup is cached per ADDE_BIN value, so a call costs one environment read
+    and a changed ADDE_BIN takes effect without clearing anything; call
+    _resolve_adde.cache_clear() after installing adde on PATH mid-process. The
+    result is an absolute path whenever the binary was found, which also lets
+    subprocess use posix_spawn.
+    """
+    return _resolve_adde(os.environ.get("ADDE_BIN"))
 
-def pull_image(
-    image: str,
-    bin_path: Optional[str] = None,
-) -> dict[str, Any]:
+
+@functools.lru_cache(maxsize=8)
+def _resolve_adde(adde_bin_env: Optional[str]) -> str:
+    if adde_bin_env:
+        return adde_bin_env
+    found = shutil.which("adde")
+    if found:
+        return found
+    cand = _REPO_ROOT / "go" / ("adde.exe" if os.name == "nt" else "adde")
+    return str(cand) if cand.is_file() else "adde"
+
+
+# Environment a daemon inherits from the caller that starts it and that changes what it
+# talks to (the Docker client reads DOCKER_*; build contexts go under TMPDIR).
+_DAEMON_ENV = (
+    "DOCKER_HOST",
+    "DOCKER_API_VERSION",
+    "DOCKER_CERT_PATH",
+    "DOCKER_TLS_VERIFY",
+    "DOCKER_CONFIG",
+    "DOCKER_CONTEXT",
+    "TMPDIR",
+)
+
+
+def _daemon_env() -> tuple[Optional[str], ...]:
+    """The environment that decides the daemon socket (see _socket_path)."""
+    env = os.environ
+    return (env.get("ADDE_SOCKET"), env.get("XDG_RUNTIME_DIR")) + tuple(env.get(k) for k in _DAEMON_ENV)
+
+
+def _socket_path(bin_: str) -> Optional[str]:
     """
-    Pulls an image from the default registry. Call before create_runtime_env
-    if the image is not already present.
+    Daemon socket for bin_: ADDE_SOCKET when set (one daemon, whatever the binary),
+    else a file in the private _socket_dir() named after the binary (real path,
+    size, mtime) and the environment a daemon inherits from its first caller
+    (_DAEMON_ENV). A different or rebuilt binary, or another Docker host, so gets
+    a daemon of its own. None if bin_ does not exist or there is no private dir.
+    """
+    if os.environ.get("ADDE_SOCKET"):
+        return os.environ["ADDE_SOCKET"]
+    try:
+        real = os.path.realpath(shutil.which(bin_) or bin_)
+        st = os.stat(real)
+    except (OSError, TypeError):
+        return None
+    env = [(k, os.environ[k]) for k in _DAEMON_ENV if k in os.environ]
+    key = hashlib.sha256(repr((real, st.st_size, st.st_mtime_ns, env)).encode()).hexdigest()[:16]
+    sock_dir = _socket_dir()
+    return os.path.join(sock_dir, f"{key}.sock") if sock_dir else None
 
-    Returns dict with keys: ok, or error.
+
+def _socket_dir() -> Optional[str]:
+    """
+    Directory for daemon sockets that only this user can enter: $XDG_RUNTIME_DIR/adde,
+    else adde-<uid> in the temp dir, created 0700. An existing one is used only if it
+    is a real directory owned by this user with no group/other access, so another
+    user cannot put a socket where the client would connect to it.
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        path = os.path.join(runtime_dir, "adde")
+    else:
+        path = os.path.join(tempfile.gettempdir(), f"adde-{os.getuid()}")
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    except OSError:
+        return None
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return None
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        return None
+    return path
+
+
+class _DaemonClient:
+    """
+    Connections to an `adde serve` daemon (one client per socket path).
+
+    Requests are newline-delimited JSON, {"tool", "params", "id"} in and
+    {"id", "result", "failed", "error"} out, so a call costs one socket round-trip
+    instead of a process launch plus Docker client setup. Each thread has its own
+    connection, so calls from different threads run concurrently in the daemon.
+    """
+
+    _instances: dict[str, "_DaemonClient"] = {}
+    _instance_lock = threading.Lock()
+    # (bin_, _daemon_env()) -> _socket_path(bin_) as of the last connect.
+    _paths: dict[tuple, Optional[str]] = {}
+    # Socket paths whose binary could not start a daemon (e.g. too old to know `serve`).
+    _unavailable: set[str] = set()
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._spawn_lock = threading.Lock()
+        self._local = threading.local()  # conn: (socket, file) for this thread; next_id
+        self.proc: Optional[subprocess.Popen] = None  # the daemon, if this client started it
+
+    @classmethod
+    def get(cls, bin_: str) -> Optional["_DaemonClient"]:
+        """Return the daemon client with this thread connected, spawning the daemon if needed; None if unavailable."""
+        if not hasattr(socket, "AF_UNIX"):
+            return None
+        key = (bin_, _daemon_env())
+        path = cls._paths.get(key)
+        if path is not None:
+            daemon = cls._instances.get(path)
+            if daemon is not None and daemon._conn() is not None:
+                return daemon
+        # Connecting: look at the binary again, so a rebuilt one gets a daemon of its own.
+        path = cls._paths[key] = _socket_path(bin_)
+        if path is None or path in cls._unavailable:
+            return None
+        with cls._instance_lock:
+            daemon = cls._instances.get(path)
+            if daemon is None:
+                daemon = cls._instances[path] = cls(path)
+        if daemon._conn() is None and not daemon._connect(bin_):
+            cls._unavailable.add(path)
+            return None
+        return daemon
+
+    def _conn(self) -> Optional[tuple[socket.socket, Any]]:
+        return getattr(self._local, "conn", None)
+
+    def _connect(self, bin_: str) -> bool:
+        try:
+            self._open()
+            return True
+        except OSError:
+            pass
+        with self._spawn_lock:
+            try:
+                self._open()  # another thread may have started it meanwhile
+                return True
+            except OSError:
+                pass
+            try:
+                proc = subprocess.Popen(
+                    [bin_, "serve", "--socket", self.path],
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    start_new_session=True,
+                )
+            except OSError:
+                return False
+            self.proc = proc
+            deadline = time.monotonic() + 5.0
+            while time.monotonic() < deadline:
+                try:
+                    self._open()
+                    return True
+                except OSError:
+                    if proc.poll() is not None:
+                        return False
+                    time.sleep(0.01)
+            return False
+
+    def _open(self) -> None:
+        # Only talk to a daemon run by this user: the socket's owner is whoever bound it.
+        if os.stat(self.path).st_uid != os.getuid():
+            raise PermissionError(f"{self.path} is owned by another user")
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            raise
+        self._local.conn = (sock, sock.makefile("rwb"))
+
+    def _close(self) -> None:
+        """Close this thread's connection."""
+        conn = self._conn()
+        self._local.conn = None
+        if conn is None:
+            return
+        for obj in reversed(conn):
+            try:
+                obj.close()
+            except OSError:
+                pass
+
+    def call(self, bin_: str, tool: str, params: Union[dict, bytes], timeout: int) -> dict:
+        req_id = self._local.next_id = getattr(self._local, "next_id", 0) + 1
+        line = _request_line(tool, params, req_id, timeout)
+        try:
+            f = self._send(bin_, line, timeout)
+        except socket.timeout:
+            self._close()
+            raise subprocess.TimeoutExpired([bin_, tool], timeout)
+        except OSError:
+            # The daemon is gone (killed, crashed) and nothing was read yet, so the
+            # request never ran: resend it once on a fresh connection (and daemon).
+            self._close()
+            try:
+                f = self._send(bin_, line, timeout)
+            except OSError as e:
+                self._close()
+                raise RuntimeError(f"adde daemon connection lost: {e}") from e
+        try:
+            reply = f.readline()
+        except socket.timeout:
+            # The reply may still arrive later; drop the connection so it can't be
+            # mistaken for the answer to the next request.
+            self._close()
+            raise subprocess.TimeoutExpired([bin_, tool], timeout)
+        except OSError as e:
+            self._close()
+            raise RuntimeError(f"adde daemon connection lost: {e}") from e
+        if not reply:
+            self._close()
+            raise RuntimeError("adde daemon closed the connection")
+        return _reply_result(reply, req_id)
+
+    def _send(self, bin_: str, line: bytes, timeout: int) -> Any:
+        """Writes line on this thread's connection (connecting first if needed); returns its file."""
+        if self._conn() is None and not self._connect(bin_):
+            raise RuntimeError(f"adde daemon unavailable at {self.path}")
+        conn = self._conn()
+        assert conn is not None
+        sock, f = conn
+        sock.settimeout(timeout)
+        f.write(line)
+        f.flush()
+        return f
+
+
+def _encode_params(params: Union[dict, bytes, None]) -> bytes:
+    """
+    JSON params for a call. params may already be encoded (a JSON object as bytes, e.g.
+    kept from an earlier _encode_params) so a repeated call skips the encode.
+    """
+    if params is None:
+        return b"{}"
+    if isinstance(params, (bytes, bytearray, memoryview)):
+        raw = bytes(params)
+        # A raw newline in valid JSON can only be whitespace (string newlines are
+        # escaped), so flattening it keeps serve/repl requests on one line.
+        return raw.replace(b"\n", b" ") if b"\n" in raw else raw
+    return _dumps(params)
+
+
+@functools.lru_cache(maxsize=256, typed=True)
+def _encoded_params(*items: Any) -> bytes:
+    """
+    Encoded params from alternating names and values, cached for wrappers whose params
+    repeat (pull_image, delete_image, ...): a repeat call skips building and encoding
+    the dict. The values are top-level arguments so typed=True keeps 24 and 24.0 (or
+    True and 1) apart; they encode differently.
+    """
+    return _dumps(dict(zip(items[::2], items[1::2])))
+
+
+def _request_line(
+    tool: str, params: Union[dict, bytes, None], req_id: int, timeout: Optional[float] = None
+) -> bytes:
+    """
+    One serve/repl request line, with the params spliced in already encoded. timeout
+    (seconds) is passed on so adde bounds the call the same way the caller does.
+    """
+    extra = b',"timeout":%s' % _dumps(timeout) if timeout is not None else b""
+    return b'{"tool":%s,"params":%s,"id":%d%s}\n' % (_dumps(tool), _encode_params(params), req_id, extra)
+
+
+def _reply_result(reply: bytes, req_id: int) -> dict:
+    """Result of a serve/repl response line; raises like _call does for a failed call."""
+    resp = _loads(reply)
+    if resp.get("id") != req_id:
+        raise RuntimeError(f"adde replied to request {resp.get('id')}, expected {req_id}")
+    if resp.get("error"):
+        raise RuntimeError(resp["error"])
+    if resp.get("failed"):
+        raise RuntimeError(_dumps(resp.get("result")).decode())
+    return resp.get("result") or {}
+
+
+# Tools that can add or remove agent images (see list_agent_images caching).
+_IMAGE_TOOLS = frozenset({"build_image_from_context", "build_image_from_path", "delete_image", "pipeline"})
+
+
+class Session:
+    """
+    One `adde repl` process reused for a sequence of calls, so a workflow pays for a
+    single process launch and Docker client setup:
+
+        with Session() as s:
+            ctx = s.call("prepare_build_context", {"files": {...}})
+            s.call("build_image_from_context", {"context_id": ctx["context_id"], "tag": tag})
+
+    call() takes the tool name and its JSON params (as documented for the CLI) and
+    returns the result dict; failures raise RuntimeError like the module functions.
+    Calls are serialized; adde limits each to call()'s timeout, or 10 minutes without one.
+    """
+
+    def __init__(self, bin_path: Optional[str] = None) -> None:
+        self.bin_path = bin_path or _find_adde()
+        self._proc: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+        self._next_id = 0
+
+    def __enter__(self) -> "Session":
+        self.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def start(self) -> None:
+        if self._proc is None:
+            self._proc = subprocess.Popen(
+                [self.bin_path, "repl"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                close_fds=False,
+            )
+
+    def call(
+        self, tool: str, params: Union[dict, bytes, None] = None, timeout: Optional[float] = None
+    ) -> dict:
+        """
+        Runs one tool call; params may be pre-encoded JSON bytes. With timeout (seconds), a call that takes longer kills the
+        repl and raises subprocess.TimeoutExpired; the next call starts a new one.
+        """
+        with self._lock:
+            if self._proc is None:
+                self.start()
+            proc = self._proc
+            assert proc is not None and proc.stdin is not None and proc.stdout is not None
+            self._next_id += 1
+            req_id = self._next_id
+            try:
+                proc.stdin.write(_request_line(tool, _with_abs_paths(tool, params), req_id, timeout))
+                proc.stdin.flush()
+                if timeout is not None and not _wait_readable(proc.stdout, timeout):
+                    self._discard()
+                    raise subprocess.TimeoutExpired([self.bin_path, tool], timeout)
+                reply = proc.stdout.readline()
+            except OSError as e:
+                self._discard()
+                raise RuntimeError(f"adde repl exited: {e}") from e
+            if not reply:
+                self._discard()
+                raise RuntimeError(f"adde repl exited with status {proc.returncode}")
+        if tool in _IMAGE_TOOLS:
+            _invalidate_image_cache()
+        return _reply_result(reply, req_id)
+
+    def _discard(self) -> None:
+        """Drops a repl that died or was killed mid-call."""
+        proc, self._proc = self._proc, None
+        if proc is not None:
+            proc.kill()
+            proc.wait()
+            for f in (proc.stdin, proc.stdout):
+                try:
+                    if f is not None:
+                        f.close()
+                except OSError:
+                    pass
+
+    def close(self) -> None:
+        """Ends the repl (EOF on its stdin) and waits for it to exit."""
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        assert proc.stdin is not None and proc.stdout is not None
+        try:
+            proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+
+
+# Resident `adde repl` processes for platforms without Unix sockets (Windows), one per
+# binary; binaries that failed the startup ping (missing, or too old for repl) are skipped.
+_repls: dict[str, Session] = {}
+_repls_lock = threading.Lock()
+_repl_unavailable: set = set()
+
+
+def _shared_repl(bin_: str) -> Optional[Session]:
+    """The process-wide Session for bin_, started and pinged on first use; None if unavailable."""
+    if bin_ in _repl_unavailable:
+        return None
+    with _repls_lock:
+        repl = _repls.get(bin_)
+        if repl is None:
+            repl = Session(bin_)
+            try:
+                repl.call("ping", timeout=5)
+            except (OSError, RuntimeError, subprocess.TimeoutExpired):
+                repl.close()
+                _repl_unavailable.add(bin_)
+                return None
+            _repls[bin_] = repl
+    return repl
+
+
+def _forget_connections() -> None:
     """
-    params = {"image": image}
-    return _call("pull_image", params, bin_path=bin_path)
+    After fork: drop the daemon connections and repls inherited from the parent. Sharing
+    them would interleave both processes' requests on one stream and mix up the replies;
+    the child connects on its own first call.
+    """
+    global _repls, _repls_lock
+    _DaemonClient._instances = {}
+    _DaemonClient._instance_lock = threading.Lock()
+    _repls = {}
+    _repls_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_connections)
+
+
+# Params naming a directory on the caller's side. They are sent as absolute paths:
+# a daemon or repl resolves relative ones against its own working directory.
+_PATH_PARAMS = {"build_image_from_path": "path", "build_image_from_context": "context_id"}
+
+
+def _with_abs_paths(tool: str, params: Any) -> Any:
+    """params with the tool's path param (and those of pipeline steps) made absolute."""
+    if not isinstance(params, dict):
+        return params
+    if tool == "pipeline" and isinstance(params.get("steps"), list):
+        steps = [
+            dict(step, params=_with_abs_paths(step.get("tool", ""), step.get("params")))
+            if isinstance(step, dict) and step.get("tool") in _PATH_PARAMS
+            else step
+            for step in params["steps"]
+        ]
+        return dict(params, steps=steps)
+    key = _PATH_PARAMS.get(tool)
+    if key and isinstance(params.get(key), str) and params[key]:
+        return dict(params, **{key: os.path.abspath(params[key])})
+    return params
 
 
 def _call(
     tool: str,
-    params: dict,
+    params: Union[dict, bytes],
     bin_path: Optional[str] = None,
     timeout: int = 120,
 ) -> dict:
     bin_ = bin_path or _find_adde()
-    payload = json.dumps(params)
-    out = subprocess.run(
-        [bin_, tool, payload],
-        capture_output=True,
-        text=True,
-        timeout=timeout,
-    )
+    params = _with_abs_paths(tool, params)
+    if os.environ.get("ADDE_NO_DAEMON") != "1":
+        daemon = _DaemonClient.get(bin_)
+        if daemon is not None:
+            return daemon.call(bin_, tool, params, timeout)
+        if not hasattr(socket, "AF_UNIX"):
+            repl = _shared_repl(bin_)
+            if repl is not None:
+                return repl.call(tool, params, timeout=timeout)
+    return _loads(_run_tool(bin_, tool, params, timeout))
+
+
+def _run_tool(bin_: str, tool: str, params: Union[dict, bytes], timeout: float) -> bytearray:
+    """Run one adde process for tool and return its stdout; raises RuntimeError on failure."""
+    # Payload on stdin rather than argv: no ARG_MAX limit for large code_content/files.
+    out = _run([bin_, tool], input=_encode_params(params), timeout=timeout)
     if out.returncode != 0:
-        err = out.stderr.strip() or out.stdout.strip() or f"adde {tool} failed"
+        err = _text(out.stderr) or _text(out.stdout) or f"adde {tool} failed"
         raise RuntimeError(err)
-    return json.loads(out.stdout)
+    return out.stdout
+
+
+def _run(argv: list[str], input: bytes, timeout: float) -> subprocess.CompletedProcess:
+    """
+    Run argv with input on stdin and capture its output, like
+    subprocess.run(capture_output=True, timeout=...).
+
+    Output is read straight into growing bytearrays that the JSON decoder accepts
+    as-is, rather than collected as chunks and joined (which briefly holds the output
+    twice). On POSIX one selector multiplexes stdin, stdout and stderr so no pipe can
+    fill and block, and its select() waits no longer than the deadline, so a timeout
+    costs no watchdog thread; on Windows, where pipes can't be selected, two helper
+    threads do the I/O and are joined up to the deadline instead.
+
+    close_fds=False lets CPython launch the child with posix_spawn instead of
+    fork+exec and skips the per-fd close sweep, which costs O(max fd) per call in a
+    process holding many sockets. This relies on descriptors being non-inheritable:
+    everything Python opens is (PEP 446), so only an fd explicitly made inheritable
+    (os.set_inheritable(fd, True)) would leak into adde.
+    """
+    proc = subprocess.Popen(
+        argv,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        close_fds=False,
+    )
+    deadline = time.monotonic() + timeout
+    with proc:
+        try:
+            if os.name == "nt":
+                stdout, stderr, done = _communicate_threaded(proc, input, deadline)
+            else:
+                stdout, stderr, done = _communicate_selector(proc, input, deadline)
+            if done:
+                try:
+                    proc.wait(max(deadline - time.monotonic(), 0))
+                except subprocess.TimeoutExpired:
+                    done = False
+        except BaseException:
+            proc.kill()
+            raise
+        if not done:
+            proc.kill()
+            raise subprocess.TimeoutExpired(argv, timeout, output=bytes(stdout), stderr=bytes(stderr))
+    return subprocess.CompletedProcess(argv, proc.returncode, stdout, stderr)
+
+
+# One selector per thread, reused across calls (_run may run on several threads at once).
+_selector_local = threading.local()
+
+
+def _selector() -> selectors.BaseSelector:
+    sel = getattr(_selector_local, "selector", None)
+    if sel is None:
+        sel = _selector_local.selector = selectors.DefaultSelector()
+    return sel
+
+
+def _drop_selector() -> None:
+    """After fork: the child must not share the parent's epoll instance, so it makes its own."""
+    sel = getattr(_selector_local, "selector", None)
+    _selector_local.selector = None
+    if sel is not None:
+        sel.close()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_drop_selector)
+
+
+def _wait_readable(f: IO[bytes], timeout: float) -> bool:
+    """
+    Whether f has data (or EOF) within timeout seconds. Where pipes can't be selected
+    (Windows) this is always True and the read blocks; the request's own timeout
+    still makes adde end the call.
+    """
+    if os.name == "nt":
+        return True
+    sel = _selector()
+    sel.register(f, selectors.EVENT_READ)
+    try:
+        return bool(sel.select(timeout))
+    finally:
+        sel.unregister(f)
+
+
+def _communicate_selector(
+    proc: subprocess.Popen, input: bytes, deadline: float
+) -> tuple[bytearray, bytearray, bool]:
+    """Feeds input and collects output until EOF on both pipes, or until deadline (done=False)."""
+    assert proc.stdin is not None and proc.stdout is not None and proc.stderr is not None
+    stdout, stderr = bytearray(), bytearray()
+    bufs = {proc.stdout.fileno(): stdout, proc.stderr.fileno(): stderr}
+    stdin_fd = proc.stdin.fileno()
+    view = memoryview(input)
+    offset = 0
+    sel = _selector()
+    try:
+        if view:
+            sel.register(stdin_fd, selectors.EVENT_WRITE)
+        else:
+            proc.stdin.close()
+        for fd in bufs:
+            sel.register(fd, selectors.EVENT_READ)
+        while sel.get_map():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return stdout, stderr, False
+            for key, _ in sel.select(remaining):
+                if key.fd == stdin_fd:
+                    try:
+                        # A writable pipe takes PIPE_BUF bytes without blocking.
+                        offset += os.write(stdin_fd, view[offset : offset + _PIPE_BUF])
+                    except BrokenPipeError:
+                        offset = len(view)  # child exited early; its exit status and stderr tell why
+                    if offset >= len(view):
+                        sel.unregister(stdin_fd)
+                        proc.stdin.close()
+                    continue
+                chunk = os.read(key.fd, 1 << 16)
+                if chunk:
+                    bufs[key.fd] += chunk
+                else:
+                    sel.unregister(key.fd)
+    finally:
+        for key in list(sel.get_map().values()):
+            sel.unregister(key.fd)
+    return stdout, stderr, True
+
+
+def _communicate_threaded(
+    proc: subprocess.Popen, input: bytes, deadline: float
+) -> tuple[bytearray, bytearray, bool]:
+    """_communicate_selector for pipes that can't be selected: helper threads do the I/O."""
+    stdin, stdout_f, stderr_f = proc.stdin, proc.stdout, proc.stderr
+    assert stdin is not None and stdout_f is not None and stderr_f is not None
+    stdout, stderr = bytearray(), bytearray()
+
+    def feed_and_read() -> None:
+        try:
+            stdin.write(input)
+            stdin.close()
+        except BrokenPipeError:
+            pass  # child exited early; its exit status and stderr tell why
+        fd = stdout_f.fileno()
+        while True:
+            chunk = os.read(fd, 1 << 16)
+            if not chunk:
+                break
+            stdout.extend(chunk)
+
+    threads = [
+        threading.Thread(target=feed_and_read, daemon=True),
+        threading.Thread(target=lambda: stderr.extend(stderr_f.read()), daemon=True),
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(max(deadline - time.monotonic(), 0))
+        if t.is_alive():
+            return stdout, stderr, False
+    return stdout, stderr, True
+
+
+def _text(data: bytes) -> str:
+    """Stripped text of captured process output."""
+    return data.decode("utf-8", errors="replace").strip()
+
+
+# Short-lived cache of image listings: (function, args) -> (expires_at, result).
+# Cleared whenever a call may have added or removed an image.
+_image_cache: dict[tuple, tuple[float, Any]] = {}
+_image_cache_lock = threading.Lock()
+
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+
+def _cached(ttl: float) -> Callable[[_F], _F]:
+    """Cache a wrapper's result for ttl seconds, keyed by its arguments."""
+
+    def decorator(fn: _F) -> _F:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            key = (fn.__name__, args, tuple(sorted(kwargs.items())))
+            now = time.monotonic()
+            with _image_cache_lock:
+                hit = _image_cache.get(key)
+            if hit is not None and hit[0] > now:
+                return hit[1]
+            result = fn(*args, **kwargs)
+            with _image_cache_lock:
+                _image_cache[key] = (now + ttl, result)
+            return result
+
+        return cast(_F, wrapper)
+
+    return decorator
+
+
+def _invalidate_image_cache() -> None:
+    with _image_cache_lock:
+        _image_cache.clear()
+
+
+def pull_image(
+    image: str,
+    force: bool = False,
+    bin_path: Optional[str] = None,
+) -> dict[str, Any]:
+    """
+    Pulls an image from the default registry. Call before create_runtime_env
+    if the image is not already present.
+
+    When the image (or image:latest, or a pinned image@sha256:...) is already in the
+    local image store, returns {"ok": True, "cached": True} without pulling; the
+    local listing is cached for a few seconds. force=True always pulls.
+
+    Returns dict with keys: ok, or error.
+    """
+    if not force and _has_local_image(image.strip(), bin_path):
+        return {"ok": True, "cached": True}
+    return _call("pull_image", _encoded_params("image", image), bin_path=bin_path)
+
+
+@_cached(ttl=5.0)
+def _local_images(bin_path: Optional[str] = None) -> frozenset:
+    """Tags and repo digests of all local images (adde list_local_images)."""
+    out = _call("list_local_images", {}, bin_path=bin_path)
+    return frozenset(out.get("tags") or ()) | frozenset(out.get("digests") or ())
+
+
+def _image_refs(image: str) -> set[str]:
+    """The local listing entries that mean image is present (image, plus :latest if untagged)."""
+    if not image:
+        return set()
+    refs = {image}
+    if "@" not in image and ":" not in image.rsplit("/", 1)[-1]:
+        refs.add(image + ":latest")
+    return refs
+
+
+def _has_local_image(image: str, bin_path: Optional[str]) -> bool:
+    """True if image is in the (cached) local image listing."""
+    refs = _image_refs(image)
+    if not refs:
+        return False
+    try:
+        local = _local_images(bin_path)
+    except RuntimeError:
+        return False  # e.g. an adde without list_local_images: just pull
+    return not refs.isdisjoint(local)
 
 
 def create_runtime_env(
@@ -65,6 +825,7 @@ def create_runtime_env(
     network: bool = False,
     port_bindings: Optional[dict[str, str]] = None,
     use_image_cmd: bool = False,
+    pool: Optional["ContainerPool"] = None,
     bin_path: Optional[str] = None,
 ) -> dict[str, Any]:
     """
@@ -77,8 +838,16 @@ def create_runtime_env(
     sleep 86400. Use this when the image runs a long-lived server; use False (default) for
     exec-based workflows where you run code via execute_code_block.
 
+    pool: an adde.pool.ContainerPool for image; takes a warm container from it (created
+    with the pool's settings, so the other arguments are ignored) instead of creating one.
+    Hand it back with cleanup_env(container_id, pool=pool).
+
     Returns dict with keys: container_id, workspace, or error.
     """
+    if pool is not None:
+        if pool.image != image:
+            raise ValueError(f"pool is for image {pool.image!r}, not {image!r}")
+        return pool.acquire()
     params: dict[str, Any] = {
         "image": image,
         "dependencies": dependencies or [],
@@ -107,36 +876,255 @@ def execute_code_block(
     params = {
         "container_id": container_id,
         "filename": filename,
-        "code_content": code_content,
         "timeout_sec": timeout_sec,
+        **_code_params(code_content, bin_path or _find_adde()),
     }
     return _call("execute_code_block", params, bin_path=bin_path)
 
 
+def execute_code_block_stream(
+    container_id: str,
+    filename: str,
+    code_content: str,
+    timeout_sec: int = 30,
+    bin_path: Optional[str] = None,
+) -> Iterator[dict[str, Any]]:
+    """
+    Like execute_code_block, but yields the program's output while it runs:
+    {"stream": "stdout"|"stderr", "data": ...} per chunk, then a final
+    {"done": True, "exit_code", "execution_time"} (or {"done": True, "error"}).
+
+    Always runs its own adde process (not the daemon). Closing the generator early
+    kills it; the code in the container may still run until timeout_sec.
+    """
+    bin_ = bin_path or _find_adde()
+    params = {
+        "container_id": container_id,
+        "filename": filename,
+        "timeout_sec": timeout_sec,
+        **_code_params(code_content, bin_),
+    }
+    proc = subprocess.Popen(
+        [bin_, "execute_code_block_stream"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        close_fds=False,
+    )
+    assert proc.stdin is not None and proc.stdout is not None and proc.stderr is not None
+    try:
+        # adde reads all of stdin before it writes anything, so this cannot block on output.
+        proc.stdin.write(_dumps(params))
+        proc.stdin.close()
+        done = False
+        for line in proc.stdout:
+            frame = _loads(line)
+            done = bool(frame.get("done"))
+            yield frame
+        proc.wait()
+        if not done:
+            err = _text(proc.stderr.read()) or "adde execute_code_block_stream failed"
+            raise RuntimeError(err)
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+        proc.stderr.close()
+
+
+# code_content larger than this is sent gzip-compressed (code_content_gz).
+_COMPRESS_THRESHOLD = 4096
+
+
+def _code_params(code_content: str, bin_: str) -> dict[str, str]:
+    """The code_content param for execute_code_block, compressed when large and bin_ supports it."""
+    if len(code_content) <= _COMPRESS_THRESHOLD or "code_content_gz" not in _features(bin_):
+        return {"code_content": code_content}
+    packed = gzip.compress(code_content.encode(), compresslevel=6, mtime=0)
+    return {"code_content_gz": base64.b64encode(packed).decode("ascii")}
+
+
+_feature_cache: dict[str, frozenset[str]] = {}
+
+
+def _features(bin_: str) -> frozenset[str]:
+    """
+    Optional params bin_ reports from ping; empty for a binary that predates them (or
+    has no ping). Only a successful probe is cached, so a timeout or a lost daemon
+    connection does not turn compression off for the rest of the process.
+    """
+    feats = _feature_cache.get(bin_)
+    if feats is None:
+        try:
+            out = _call("ping", {}, bin_path=bin_, timeout=10)
+        except (RuntimeError, OSError, subprocess.TimeoutExpired):
+            return frozenset()
+        feats = _feature_cache[bin_] = frozenset(out.get("features") or ())
+    return feats
+
+
 def get_container_logs(
     container_id: str,
     tail_lines: int = 0,
+    framed: bool = False,
     bin_path: Optional[str] = None,
-) -> dict[str, Any]:
+) -> Union[dict[str, Any], "LogResult"]:
     """
     Returns the last execution's structured log for the refiner agent.
 
     Keys: log (exit_code, stdout, stderr, execution_time), or error.
     tail_lines: 0 = all; otherwise last N lines of stdout/stderr.
+
+    framed=True returns a LogResult instead, read from a binary frame so stdout and
+    stderr are memoryview slices of the raw output with no JSON unescaping; suited to
+    polling large logs. It always runs adde directly (not via the daemon) and raises
+    RuntimeError when there is no log.
     """
-    params = {"container_id": container_id, "tail_lines": tail_lines}
-    return _call("get_container_logs", params, bin_path=bin_path)
+    params: dict[str, Any] = {"container_id": container_id, "tail_lines": tail_lines}
+    if not framed:
+        return _call("get_container_logs", params, bin_path=bin_path)
+    params["framed"] = True
+    out = _run_tool(bin_path or _find_adde(), "get_container_logs", params, timeout=120)
+    return _parse_log_frame(out)
+
+
+class LogResult(NamedTuple):
+    """get_container_logs(framed=True) result; stdout/stderr are undecoded bytes."""
+
+    exit_code: int
+    stdout: memoryview
+    stderr: memoryview
+    execution_time: float  # seconds
+
+
+_LOG_FRAME_MAGIC = b"ADDEFRM1"
+
+
+def _parse_log_frame(buf: Union[bytes, bytearray]) -> LogResult:
+    """
+    Parse adde's framed log output: magic, then header JSON, stdout and stderr, each
+    prefixed by a big-endian uint64 length. Falls back to the JSON form for an adde
+    that doesn't know "framed".
+    """
+    view = memoryview(buf)
+    if view[: len(_LOG_FRAME_MAGIC)] != _LOG_FRAME_MAGIC:
+        log = _loads(buf)["log"]
+        return LogResult(
+            log["exit_code"],
+            memoryview(log["stdout"].encode()),
+            memoryview(log["stderr"].encode()),
+            _seconds(log["execution_time"]),
+        )
+    sections = []
+    offset = len(_LOG_FRAME_MAGIC)
+    for _ in range(3):
+        (n,) = struct.unpack_from(">Q", view, offset)
+        offset += 8
+        sections.append(view[offset : offset + n])
+        offset += n
+    header = _loads(bytes(sections[0]))
+    return LogResult(header["exit_code"], sections[1], sections[2], _seconds(header["execution_time"]))
+
+
+def _seconds(execution_time: str) -> float:
+    """'1.25s' -> 1.25 (0.0 if unparseable)."""
+    try:
+        return float(execution_time.rstrip("s"))
+    except (AttributeError, ValueError):
+        return 0.0
 
 
 def cleanup_env(
     container_id: str,
+    pool: Optional["ContainerPool"] = None,
     bin_path: Optional[str] = None,
 ) -> dict[str, Any]:
-    """Stops and removes the container."""
+    """
+    Stops and removes the container. With pool, a container taken from that pool is
+    reset and returned to it for reuse instead (removed if the pool is already full or
+    the reset fails); ValueError if the container didn't come from pool.
+    """
+    if pool is not None:
+        return pool.release(container_id)
     params = {"container_id": container_id}
     return _call("cleanup_env", params, bin_path=bin_path)
 
 
+def reset_env(
+    container_id: str,
+    bin_path: Optional[str] = None,
+) -> dict[str, Any]:
+    """
+    Readies a container for reuse: restarts it (killing any processes left running) and
+    empties /workspace (including the last run log). Files changed elsewhere in the
+    container are kept. Used by ContainerPool.
+
+    Returns dict with keys: ok, or error.
+    """
+    return _call("reset_env", {"container_id": container_id}, bin_path=bin_path)
+
+
+def pipeline(
+    steps: list[dict[str, Any]],
+    bin_path: Optional[str] = None,
+    timeout: int = 900,
+) -> dict[str, Any]:
+    """
+    Runs several tool calls in order in a single adde invocation (one process launch
+    and one Docker client for the whole sequence).
+
+    Each step: {"tool": ..., "params": {...}} plus optional
+    - "id": name for referencing the step's result (steps are also named step1, step2, ...)
+    - "bind": {param: "$.<step>.<field>"} – fill a param from an earlier step's result,
+      e.g. {"container_id": "$.env.container_id"}
+    - "always": True – run even after an earlier step failed (e.g. cleanup_env)
+
+    Steps after the first failure are skipped (null result) unless marked always.
+    A failing step does not raise: returns dict with results (one per step), plus
+    failed_step (1-based) and error when a step failed.
+    """
+    try:
+        return _call("pipeline", {"steps": steps}, bin_path=bin_path, timeout=timeout)
+    finally:
+        _invalidate_image_cache()  # steps may have built or deleted images
+
+
+def batch(
+    calls: list[Union[tuple, dict[str, Any]]],
+    bin_path: Optional[str] = None,
+    timeout: int = 900,
+) -> list[Optional[dict[str, Any]]]:
+    """
+    Runs several tool calls in one adde invocation and returns their results in order.
+
+    Each call is (tool, params), (tool, params, bind) – bind as in pipeline, where the
+    n-th call's result is "$.step<n>" – or a full pipeline step dict (e.g. for
+    "always": True). Raises RuntimeError with the first failing call's error, after
+    any "always" calls have run.
+    """
+    return _batch_results(pipeline(_batch_steps(calls), bin_path=bin_path, timeout=timeout))
+
+
+def _batch_steps(calls: list[Union[tuple, dict[str, Any]]]) -> list[dict[str, Any]]:
+    steps = []
+    for c in calls:
+        if isinstance(c, dict):
+            steps.append(c)
+            continue
+        step: dict[str, Any] = {"tool": c[0], "params": c[1] if len(c) > 1 else {}}
+        if len(c) > 2 and c[2]:
+            step["bind"] = c[2]
+        steps.append(step)
+    return steps
+
+
+def _batch_results(out: dict[str, Any]) -> list[Optional[dict[str, Any]]]:
+    if out.get("error"):
+        raise RuntimeError(out["error"])
+    return out["results"]
+
+
 # ---- Image Builder & Factory ----
 
 
@@ -158,23 +1146,163 @@ def prepare_build_context(
     return _call("prepare_build_context", params, bin_path=bin_path)
 
 
+def _tar_context(files: Union[dict[str, Union[str, bytes]], str, os.PathLike]) -> str:
+    """Packs files (name -> content, or a directory) into a gzipped tar; returns it base64-encoded."""
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as tar:
+        if isinstance(files, dict):
+            for name, content in files.items():
+                data = content.encode() if isinstance(content, str) else content
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                info.mode = 0o644
+                tar.addfile(info, io.BytesIO(data))
+        else:
+            tar.add(os.fspath(files), arcname=".")
+    return base64.b64encode(buf.getvalue()).decode("ascii")
+
+
+def prepare_build_context_tar(
+    files: Union[dict[str, Union[str, bytes]], str, os.PathLike],
+    context_id: Optional[str] = None,
+    bin_path: Optional[str] = None,
+) -> dict[str, Any]:
+    """
+    Like prepare_build_context, but ships the files as a single gzipped tar instead of one
+    JSON string per file. files is a dict of name -> content (str or bytes) or a directory
+    to pack; binary files are supported.
+
+    Returns dict with context_id (absolute path to build context dir), or error.
+    """
+    params: dict[str, Any] = {"archive": _tar_context(files)}
+    if context_id is not None:
+        params["context_id"] = context_id
+    return _call("prepare_build_context_tar", params, bin_path=bin_path)
+
+
 def build_image_from_context(
     context_id: str,
     tag: str,
     build_args: Optional[dict[str, str]] = None,
+    force: bool = False,
     bin_path: Optional[str] = None,
 ) -> dict[str, Any]:
     """
     Runs docker build from the context directory (path from prepare_build_context).
     Tag convention: agent-env:{task_id}-{timestamp}. Returns handshake:
     { status, image_id, tag, size_mb, build_log_summary } or error/failed_layer.
+
+    If the same context contents were already built with this agent-env: tag and
+    build_args, and that image still exists, returns the earlier result with
+    "cached": True instead of rebuilding. force=True always builds.
     """
     params: dict[str, Any] = {"context_id": context_id, "tag": tag}
     if build_args:
         params["build_args"] = build_args
-    return _call(
+    key = None if force else _context_fingerprint(context_id, tag, build_args)
+    if key is not None:
+        hit = _build_index_get(key)
+        if hit is not None and _image_exists(hit, bin_path):
+            return {**hit, "cached": True}
+    out = _call(
         "build_image_from_context", params, bin_path=bin_path, timeout=600
     )
+    _invalidate_image_cache()
+    if key is not None and out.get("status") == "success" and out.get("image_id"):
+        _build_index_put(key, out)
+    return out
+
+
+# ---- Build index: skip rebuilding an unchanged context ----
+#
+# Maps a fingerprint of (context contents, tag, build_args) to the result of the last
+# successful build, in $XDG_CACHE_HOME/adde/build_index.json (~/.cache by default).
+
+_BUILD_INDEX_MAX = 256
+_build_index_lock = threading.Lock()
+
+
+def _build_index_path() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "adde" / "build_index.json"
+
+
+def _context_fingerprint(
+    context_dir: str, tag: str, build_args: Optional[dict[str, str]]
+) -> Optional[str]:
+    """
+    SHA-256 over each file's relative path, mode and contents (plus tag and build_args);
+    None if the directory can't be read. Contents rather than mtimes: every
+    prepare_build_context writes a fresh directory, so mtimes never repeat.
+    """
+    h = hashlib.sha256(json.dumps([tag, build_args or {}], sort_keys=True).encode())
+    root = Path(context_dir)
+    try:
+        if not root.is_dir():
+            return None
+        for p in sorted(root.rglob("*")):
+            rel = p.relative_to(root).as_posix().encode()
+            st = p.lstat()
+            if p.is_symlink():
+                h.update(b"L\0" + rel + b"\0" + os.readlink(p).encode() + b"\0")
+            elif p.is_file():
+                h.update(b"F\0" + rel + b"\0" + b"%o\0" % (st.st_mode & 0o777))
+                fh = hashlib.sha256()
+                with open(p, "rb") as f:
+                    for chunk in iter(lambda: f.read(1 << 20), b""):
+                        fh.update(chunk)
+                h.update(fh.digest())
+            elif p.is_dir():
+                h.update(b"D\0" + rel + b"\0")
+    except OSError:
+        return None
+    return h.hexdigest()
+
+
+def _build_index_load() -> dict:
+    try:
+        with open(_build_index_path(), "rb") as f:
+            index = _loads(f.read())
+    except (OSError, ValueError):
+        return {}
+    return index if isinstance(index, dict) else {}
+
+
+def _build_index_get(key: str) -> Optional[dict]:
+    with _build_index_lock:
+        return _build_index_load().get(key)
+
+
+def _build_index_put(key: str, result: dict) -> None:
+    path = _build_index_path()
+    with _build_index_lock:
+        index = _build_index_load()
+        index.pop(key, None)
+        index[key] = result
+        while len(index) > _BUILD_INDEX_MAX:
+            index.pop(next(iter(index)))  # oldest first
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            tmp.write_bytes(_dumps(index))
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+
+def _image_exists(result: dict, bin_path: Optional[str]) -> bool:
+    """True if the built image is still tagged locally (cached list_agent_images)."""
+    tag = result.get("tag") or ""
+    if not tag.startswith("agent-env:"):
+        return False
+    try:
+        listing = list_agent_images(filter_tag=tag, bin_path=bin_path)
+    except RuntimeError:
+        return False
+    return any(
+        im.get("id") == result.get("image_id") and tag in (im.get("tags") or [])
+        for im in listing.get("images") or []
+    )
 
 
 def build_image_from_path(
@@ -198,11 +1326,14 @@ def build_image_from_path(
     params: dict[str, Any] = {"path": path, "tag": tag}
     if build_args:
         params["build_args"] = build_args
-    return _call(
+    out = _call(
         "build_image_from_path", params, bin_path=bin_path, timeout=600
     )
+    _invalidate_image_cache()
+    return out
 
 
+@_cached(ttl=2.0)
 def list_agent_images(
     filter_tag: Optional[str] = None,
     bin_path: Optional[str] = None,
@@ -210,10 +1341,11 @@ def list_agent_images(
     """
     Returns a list of custom images created by the agent (tagged agent-env:...).
     filter_tag: optional prefix filter (e.g. 'agent-env' or 'agent-env:task-123').
+
+    Results are cached for 2 seconds (until the next build or delete_image through
+    this client); treat the returned dict as read-only.
     """
-    params: dict[str, Any] = {}
-    if filter_tag is not None:
-        params["filter_tag"] = filter_tag
+    params = _encoded_params("filter_tag", filter_tag) if filter_tag is not None else _encoded_params()
     return _call("list_agent_images", params, bin_path=bin_path)
 
 
@@ -226,9 +1358,7 @@ def prune_build_cache(
     older_than_hrs: 0 = prune all unused; >0 = only prune cache older than that many hours.
     Returns space_reclaimed_mb or error.
     """
-    params: dict[str, Any] = {}
-    if older_than_hrs > 0:
-        params["older_than_hrs"] = older_than_hrs
+    params = _encoded_params("older_than_hrs", older_than_hrs) if older_than_hrs > 0 else _encoded_params()
     return _call("prune_build_cache", params, bin_path=bin_path)
 
 
@@ -253,7 +1383,9 @@ def delete_image(
             'only agent-created images can be deleted (image must start with "agent-env:"); '
             "use list_agent_images to see allowed tags"
         )
-    params: dict[str, Any] = {"image": image, "agent_env_only": True}
+    items: tuple[Any, ...] = ("image", image, "agent_env_only", True)
     if force:
-        params["force"] = True
-    return _call("delete_image", params, bin_path=bin_path)
+        items += ("force", True)
+    out = _call("delete_image", _encoded_params(*items), bin_path=bin_path)
+    _invalidate_image_cache()
+    return out
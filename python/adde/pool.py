@@ -0,0 +1,125 @@
+"""
+ADDE container pool – keeps warm containers for one image so hot loops skip
+Docker's create+start cost per task.
+
+    pool = ContainerPool("python:3.11-slim", size=2)
+    pool.fill()  # optional: warm up front
+    r = create_runtime_env("python:3.11-slim", pool=pool)
+    ...
+    cleanup_env(r["container_id"], pool=pool)  # back to the pool, not removed
+    pool.close()  # removes the idle containers
+
+Every container comes from create_runtime_env with the pool's settings. When
+released, a container gets a reset_env before it goes back to the pool: it is
+restarted, which kills whatever the last task left running, and its /workspace
+is emptied. One whose reset fails is removed instead; acquire creates a new
+container when no idle one is left.
+
+Isolation is weaker than a fresh container per task: changes outside
+/workspace (installed packages, files in /tmp or the home directory) persist
+into the next task that gets the container. Don't share a pool between tasks
+that must not see each other's leftovers.
+"""
+
+import threading
+from typing import Any, Optional
+
+from .client import cleanup_env, create_runtime_env, reset_env
+
+
+class ContainerPool:
+    """Up to size idle containers of image, created with the given settings."""
+
+    def __init__(
+        self,
+        image: str,
+        size: int = 2,
+        dependencies: Optional[list[str]] = None,
+        env_vars: Optional[dict[str, str]] = None,
+        network: bool = False,
+        bin_path: Optional[str] = None,
+    ) -> None:
+        self.image = image
+        self.size = size
+        self.bin_path = bin_path
+        self._settings: dict[str, Any] = {
+            "dependencies": dependencies,
+            "env_vars": env_vars,
+            "network": network,
+        }
+        self._idle: list[dict[str, Any]] = []
+        self._in_use: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "ContainerPool":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def _create(self) -> dict[str, Any]:
+        return create_runtime_env(self.image, **self._settings, bin_path=self.bin_path)
+
+    def _checkout(self, env: dict[str, Any]) -> dict[str, Any]:
+        with self._lock:
+            self._in_use[env["container_id"]] = dict(env)
+        return env
+
+    def fill(self) -> None:
+        """Creates containers until size are idle."""
+        while True:
+            with self._lock:
+                if len(self._idle) >= self.size:
+                    return
+            env = self._create()
+            with self._lock:
+                self._idle.append(env)
+
+    def acquire(self) -> dict[str, Any]:
+        """
+        Returns an idle container (reset when it was released) or a new one, in the
+        shape of create_runtime_env's result plus "pooled": True for a reused container.
+        """
+        with self._lock:
+            env = self._idle.pop() if self._idle else None
+        if env is not None:
+            return self._checkout({**env, "pooled": True})
+        return self._checkout(self._create())
+
+    def release(self, container_id: str) -> dict[str, Any]:
+        """
+        Resets a container handed out by acquire and returns it to the pool, or removes
+        it (like cleanup_env) if the pool is full or the reset fails. Raises ValueError
+        for a container that isn't checked out from this pool.
+        """
+        with self._lock:
+            env = self._in_use.pop(container_id, None)
+            keep = len(self._idle) < self.size
+        if env is None:
+            raise ValueError(f"container {container_id!r} was not acquired from this pool")
+        if keep:
+            try:
+                reset_env(container_id, bin_path=self.bin_path)
+            except RuntimeError:
+                keep = False  # gone or broken
+        if keep:
+            env.pop("pooled", None)
+            with self._lock:
+                # Another release may have filled the pool during the reset.
+                if len(self._idle) < self.size:
+                    self._idle.append(env)
+                    return {"ok": True, "pooled": True}
+        return self._remove(container_id)
+
+    def close(self) -> None:
+        """Removes all idle containers."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for env in idle:
+            try:
+                self._remove(env["container_id"])
+            except RuntimeError:
+                pass
+
+    def _remove(self, container_id: str) -> dict[str, Any]:
+        return cleanup_env(container_id, bin_path=self.bin_path)
@@ -0,0 +1,148 @@
+"""
+Tests for the ADDE asyncio client (adde.async_client).
+
+asyncio.create_subprocess_exec is mocked; no binary or Docker needed.
+"""
+
+import asyncio
+import json
+import subprocess
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from adde import async_client
+from adde.client import LogResult, _invalidate_image_cache
+
+
+def _proc(stdout=b'{"ok":true}', stderr=b"", returncode=0):
+    proc = MagicMock()
+    proc.communicate = AsyncMock(return_value=(stdout, stderr))
+    proc.wait = AsyncMock(return_value=returncode)
+    proc.returncode = returncode
+    return proc
+
+
+@pytest.fixture
+def mock_exec():
+    """Patch asyncio.create_subprocess_exec; each call returns a fresh successful process."""
+    _invalidate_image_cache()
+    with patch("adde.async_client.asyncio.create_subprocess_exec", new_callable=AsyncMock) as m:
+        m.side_effect = lambda *args, **kwargs: _proc()
+        yield m
+    _invalidate_image_cache()
+
+
+def test_acall_passes_tool_and_stdin_payload(mock_exec):
+    proc = _proc(stdout=b'{"container_id":"abc"}')
+    mock_exec.side_effect = None
+    mock_exec.return_value = proc
+    out = asyncio.run(
+        async_client.create_runtime_env("busybox", network=True, bin_path="/fake/adde")
+    )
+    assert out == {"container_id": "abc"}
+    assert mock_exec.call_args.args == ("/fake/adde", "create_runtime_env")
+    payload = json.loads(proc.communicate.call_args.args[0])
+    assert payload == {"image": "busybox", "dependencies": [], "env_vars": {}, "network": True}
+
+
+def test_acall_raises_on_nonzero_exit(mock_exec):
+    mock_exec.side_effect = None
+    mock_exec.return_value = _proc(stdout=b"", stderr=b"adde: no such image", returncode=1)
+    with pytest.raises(RuntimeError, match="no such image"):
+        asyncio.run(async_client.pull_image("nope", bin_path="/fake/adde"))
+
+
+def test_acall_timeout_kills_process(mock_exec):
+    proc = _proc()
+
+    async def hang(_input):
+        await asyncio.sleep(10)
+
+    proc.communicate = hang
+    mock_exec.side_effect = None
+    mock_exec.return_value = proc
+    with pytest.raises(subprocess.TimeoutExpired):
+        asyncio.run(async_client._acall("pull_image", {"image": "x"}, bin_path="/fake/adde", timeout=0.05))
+    proc.kill.assert_called_once()
+
+
+def test_gather_pulls_runs_all_images(mock_exec):
+    out = asyncio.run(async_client.gather_pulls(["busybox", "alpine", "python:3.11-slim"], bin_path="/fake/adde"))
+    assert out == [{"ok": True}] * 3
+    pulls = [c for c in mock_exec.call_args_list if c.args[1] == "pull_image"]
+    assert len(pulls) == 3
+
+
+def test_pull_image_skips_local_image_unless_forced(mock_exec):
+    def spawn(bin_, tool, **kwargs):
+        if tool == "list_local_images":
+            return _proc(stdout=b'{"tags":["busybox:latest"],"digests":[]}')
+        return _proc()
+
+    mock_exec.side_effect = spawn
+    assert asyncio.run(async_client.pull_image("busybox", bin_path="/fake/adde")) == {"ok": True, "cached": True}
+    assert asyncio.run(async_client.pull_image("busybox", force=True, bin_path="/fake/adde")) == {"ok": True}
+    assert [c.args[1] for c in mock_exec.call_args_list] == ["list_local_images", "pull_image"]
+    # A build invalidates the listing, so the next pull lists images again.
+    asyncio.run(async_client.build_image_from_path("/app", "agent-env:t", bin_path="/fake/adde"))
+    asyncio.run(async_client.pull_image("busybox", bin_path="/fake/adde"))
+    assert mock_exec.call_args_list[-1].args[1] == "list_local_images"
+
+
+def test_get_container_logs_framed(mock_exec):
+    import struct
+
+    header = b'{"exit_code":0,"execution_time":"0.5s"}'
+    frame = b"ADDEFRM1" + b"".join(struct.pack(">Q", len(b)) + b for b in (header, b"out", b"err"))
+    mock_exec.side_effect = None
+    mock_exec.return_value = _proc(stdout=frame)
+    out = asyncio.run(async_client.get_container_logs("cid", framed=True, bin_path="/fake/adde"))
+    assert isinstance(out, LogResult)
+    assert (out.exit_code, bytes(out.stdout), bytes(out.stderr), out.execution_time) == (0, b"out", b"err", 0.5)
+
+
+def test_execute_code_block_calls_overlap(mock_exec):
+    """Eight gathered calls are all in flight at once rather than run one after another."""
+    running = 0
+    peak = 0
+
+    async def communicate(_input):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.05)
+        running -= 1
+        return b'{"log":{"exit_code":0,"stdout":"ok"}}', b""
+
+    def spawn(*args, **kwargs):
+        proc = _proc()
+        proc.communicate = communicate
+        return proc
+
+    mock_exec.side_effect = spawn
+
+    async def run_all():
+        return await asyncio.gather(
+            *(async_client.execute_code_block(f"cid{i}", "t.sh", "echo ok", bin_path="/fake/adde") for i in range(8))
+        )
+
+    out = asyncio.run(run_all())
+    assert [r["log"]["stdout"] for r in out] == ["ok"] * 8
+    assert peak == 8
+
+
+def test_batch_returns_results(mock_exec):
+    mock_exec.side_effect = None
+    mock_exec.return_value = _proc(stdout=b'{"results":[{"ok":true},{"ok":true}]}')
+    out = asyncio.run(
+        async_client.batch([("cleanup_env", {"container_id": "a"}), ("cleanup_env", {"container_id": "b"})], bin_path="/fake/adde")
+    )
+    assert out == [{"ok": True}, {"ok": True}]
+    assert mock_exec.call_args.args == ("/fake/adde", "pipeline")
+
+
+def test_delete_image_non_agent_env_raises_value_error(mock_exec):
+    with pytest.raises(ValueError):
+        asyncio.run(async_client.delete_image("busybox", bin_path="/fake/adde"))
+    mock_exec.assert_not_called()
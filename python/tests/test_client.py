@@ -5,25 +5,48 @@ Unit tests mock subprocess; integration tests call the real adde binary when
 available (set ADDE_BIN or have go/adde.exe in repo).
 """
 
+import base64
+import functools
+import gzip
+import io
 import json
 import os
+import socket
+import struct
+import subprocess
+import tarfile
+import threading
+import time
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
 
+import adde.client
+
 from adde.client import (
+    _DaemonClient,
     _call,
+    _invalidate_image_cache,
+    _run,
+    _features,
     _find_adde,
+    _resolve_adde,
+    LogResult,
+    Session,
+    batch,
     build_image_from_context,
     build_image_from_path,
     cleanup_env,
     create_runtime_env,
     delete_image,
     execute_code_block,
+    execute_code_block_stream,
     get_container_logs,
     list_agent_images,
+    pipeline,
     prepare_build_context,
+    prepare_build_context_tar,
     prune_build_cache,
     pull_image,
 )
@@ -32,19 +55,106 @@ from adde.client import (
 # ---- Unit tests (mocked subprocess) ----
 
 
+@pytest.fixture(autouse=True)
+def clear_image_cache():
+    """Keep cached image listings from leaking between tests."""
+    _invalidate_image_cache()
+    yield
+    _invalidate_image_cache()
+
+
+@pytest.fixture(autouse=True)
+def isolated_build_index(tmp_path, monkeypatch):
+    """Point the on-disk build index at a per-test directory."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+
+
+def _completed(returncode=0, stdout=b"", stderr=b""):
+    """A result of adde.client._run; a plain CompletedProcess is much cheaper to build than a MagicMock."""
+    return subprocess.CompletedProcess(["adde"], returncode, stdout, stderr)
+
+
 @pytest.fixture
-def mock_subprocess_run():
-    """Patch subprocess.run and capture call args."""
-    with patch("adde.client.subprocess.run") as m:
+def mock_subprocess_run(monkeypatch):
+    """Patch the subprocess runner adde.client._run (daemon disabled) and capture call args."""
+    monkeypatch.setenv("ADDE_NO_DAEMON", "1")
+    # A new patch per test rather than one session-wide mock: several tests run the real
+    # _run (pipe deadlock and timeout tests, fake repl and stream scripts, integration),
+    # and a shared mock carries return values and child mocks from one test to the next.
+    with patch("adde.client._run") as m:
         yield m
 
 
-def test_find_adde_uses_env_when_set(monkeypatch):
+@pytest.fixture
+def fake_daemon(tmp_path, monkeypatch):
+    """Serve canned replies on a Unix socket the way `adde serve` does; yields the received requests."""
+    if not hasattr(socket, "AF_UNIX"):
+        pytest.skip("Unix sockets not available")
+    path = str(tmp_path / "adde.sock")
+    monkeypatch.setenv("ADDE_SOCKET", path)
+    monkeypatch.delenv("ADDE_NO_DAEMON", raising=False)
+    monkeypatch.setattr(_DaemonClient, "_instances", {})
+    monkeypatch.setattr(_DaemonClient, "_paths", {})
+    monkeypatch.setattr(_DaemonClient, "_unavailable", set())
+    srv = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    srv.bind(path)
+    srv.listen(8)
+    received = []
+    replies = {}
+
+    def handle(conn):
+        with conn, conn.makefile("rwb") as f:
+            for line in f:
+                req = json.loads(line)
+                received.append(req)
+                if req["tool"] == "sleep":
+                    time.sleep(0.3)
+                reply = dict(replies.get(req["tool"], {"result": {"ok": True}}), id=req["id"])
+                f.write(json.dumps(reply).encode() + b"\n")
+                f.flush()
+                if req["tool"] == "drop":
+                    return  # the daemon going away after this reply
+
+    def serve():
+        while True:
+            try:
+                conn, _ = srv.accept()
+            except OSError:
+                return
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+    t = threading.Thread(target=serve, daemon=True)
+    t.start()
+    yield received, replies
+    for daemon in _DaemonClient._instances.values():
+        daemon._close()
+    srv.close()
+
+
+@pytest.fixture
+def fresh_find_adde():
+    """Drop the memoized binary path before and after the test."""
+    _resolve_adde.cache_clear()
+    yield
+    _resolve_adde.cache_clear()
+
+
+def test_find_adde_uses_env_when_set(monkeypatch, fresh_find_adde):
     monkeypatch.setenv("ADDE_BIN", "/custom/adde.exe")
     assert _find_adde() == "/custom/adde.exe"
 
 
-def test_find_adde_returns_string(monkeypatch):
+def test_find_adde_is_cached_per_adde_bin(monkeypatch, fresh_find_adde):
+    monkeypatch.delenv("ADDE_BIN", raising=False)
+    which = MagicMock(return_value="/usr/bin/adde")
+    monkeypatch.setattr("adde.client.shutil.which", which)
+    assert _find_adde() == _find_adde() == "/usr/bin/adde"
+    which.assert_called_once()
+    monkeypatch.setenv("ADDE_BIN", "/other/adde")
+    assert _find_adde() == "/other/adde"
+
+
+def test_find_adde_returns_string(monkeypatch, fresh_find_adde):
     monkeypatch.delenv("ADDE_BIN", raising=False)
     result = _find_adde()
     assert isinstance(result, str) and len(result) > 0
@@ -52,42 +162,447 @@ def test_find_adde_returns_string(monkeypatch):
     assert "adde" in result.lower()
 
 
+def test_find_adde_prefers_path_over_repo(monkeypatch, fresh_find_adde, tmp_path):
+    monkeypatch.delenv("ADDE_BIN", raising=False)
+    monkeypatch.setattr("adde.client.shutil.which", lambda name: str(tmp_path / name))
+    assert _find_adde() == str(tmp_path / "adde")
+
+
 def test_call_invokes_binary_with_tool_and_json(mock_subprocess_run):
-    mock_subprocess_run.return_value = MagicMock(returncode=0, stdout='{"ok":true}', stderr="")
+    mock_subprocess_run.return_value = _completed(returncode=0, stdout=b'{"ok":true}', stderr=b"")
     _call("pull_image", {"image": "busybox"}, bin_path="/fake/adde.exe")
     mock_subprocess_run.assert_called_once()
     args = mock_subprocess_run.call_args[0][0]
-    assert args[0] == "/fake/adde.exe"
-    assert args[1] == "pull_image"
-    assert json.loads(args[2]) == {"image": "busybox"}
+    assert args == ["/fake/adde.exe", "pull_image"]
+    assert json.loads(mock_subprocess_run.call_args.kwargs["input"]) == {"image": "busybox"}
 
 
 def test_call_returns_parsed_json(mock_subprocess_run):
-    mock_subprocess_run.return_value = MagicMock(returncode=0, stdout='{"ok":true}', stderr="")
+    mock_subprocess_run.return_value = _completed(returncode=0, stdout=b'{"ok":true}', stderr=b"")
     out = _call("pull_image", {"image": "busybox"}, bin_path="/fake/adde")
     assert out == {"ok": True}
 
 
+def _fresh_client_module(name):
+    """A separate copy of adde.client, so module-level setup runs again."""
+    import importlib.util
+
+    spec = importlib.util.spec_from_file_location(name, adde.client.__file__)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def test_stdlib_json_fallback_is_compact(monkeypatch):
+    import sys
+
+    monkeypatch.delenv("ADDE_JSON_BACKEND", raising=False)
+    monkeypatch.setitem(sys.modules, "msgspec", None)  # imports fail -> stdlib path
+    monkeypatch.setitem(sys.modules, "orjson", None)
+    mod = _fresh_client_module("_adde_client_stdlib")
+    assert mod.msgspec is None and mod.orjson is None
+    assert mod._dumps({"a": [1, "é"], "b": None}) == '{"a":[1,"é"],"b":null}'.encode()
+
+
+def test_json_backend_env_var(monkeypatch):
+    monkeypatch.setenv("ADDE_JSON_BACKEND", "stdlib")
+    mod = _fresh_client_module("_adde_client_env_stdlib")
+    assert mod._loads is json.loads
+    assert mod._dumps({"a": 1}) == b'{"a":1}'
+    monkeypatch.setenv("ADDE_JSON_BACKEND", "yaml")
+    with pytest.raises(ValueError, match="ADDE_JSON_BACKEND"):
+        _fresh_client_module("_adde_client_env_bad")
+
+
+def test_call_decodes_bytes_output(mock_subprocess_run):
+    mock_subprocess_run.return_value = _completed(
+        returncode=0, stdout='{"log":{"stdout":"héllo"}}\n'.encode(), stderr=b""
+    )
+    out = _call("get_container_logs", {"container_id": "cid"}, bin_path="/fake/adde")
+    assert out == {"log": {"stdout": "héllo"}}
+
+
 def test_call_raises_on_nonzero_exit(mock_subprocess_run):
-    mock_subprocess_run.return_value = MagicMock(
-        returncode=1, stdout="", stderr="adde: no such image"
+    mock_subprocess_run.return_value = _completed(
+        returncode=1, stdout=b"", stderr=b"adde: no such image"
     )
     with pytest.raises(RuntimeError, match="no such image|adde pull_image failed"):
         _call("pull_image", {"image": "nonexistent"}, bin_path="/fake/adde")
 
 
+def test_call_uses_daemon_when_available(fake_daemon):
+    received, _ = fake_daemon
+    with patch("adde.client._run") as run:
+        assert _call("pull_image", {"image": "busybox"}, bin_path="/fake/adde") == {"ok": True}
+        assert _call("cleanup_env", {"container_id": "cid"}, bin_path="/fake/adde") == {"ok": True}
+    run.assert_not_called()
+    assert [(r["tool"], r["params"]) for r in received] == [
+        ("pull_image", {"image": "busybox"}),
+        ("cleanup_env", {"container_id": "cid"}),
+    ]
+    assert received[0]["id"] != received[1]["id"]
+
+
+def test_daemon_request_carries_call_timeout(fake_daemon):
+    received, _ = fake_daemon
+    pipeline([{"tool": "list_agent_images"}], bin_path="/fake/adde")
+    assert received[-1]["timeout"] == 900
+
+
+def test_daemon_calls_from_threads_run_concurrently(fake_daemon):
+    errors = []
+
+    def work():
+        try:
+            _call("sleep", {}, bin_path="/fake/adde")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work) for _ in range(3)]
+    start = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert time.monotonic() - start < 0.8  # three 0.3 s calls, not one after another
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_forked_child_opens_its_own_daemon_connection(fake_daemon):
+    received, _ = fake_daemon
+    _call("pull_image", {"image": "parent"}, bin_path="/fake/adde")
+    parent_conn = next(iter(_DaemonClient._instances.values()))._conn()
+    pid = os.fork()
+    if pid == 0:
+        ok = False
+        try:
+            ok = not _DaemonClient._instances and all(
+                _call("pull_image", {"image": "child"}, bin_path="/fake/adde") == {"ok": True} for _ in range(20)
+            )
+            ok = ok and next(iter(_DaemonClient._instances.values()))._conn() is not parent_conn
+        finally:
+            os._exit(0 if ok else 1)
+    for _ in range(20):
+        assert _call("pull_image", {"image": "parent"}, bin_path="/fake/adde") == {"ok": True}
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert sum(r["params"]["image"] == "child" for r in received) == 20
+
+
+def test_daemon_call_reconnects_after_the_daemon_drops_the_connection(fake_daemon):
+    received, _ = fake_daemon
+    _call("drop", {}, bin_path="/fake/adde")
+    time.sleep(0.05)  # let the server side close
+    assert _call("pull_image", {"image": "busybox"}, bin_path="/fake/adde") == {"ok": True}
+    assert [r["tool"] for r in received] == ["drop", "pull_image"]
+
+
+def test_no_daemon_only_for_1(fake_daemon, monkeypatch):
+    received, _ = fake_daemon
+    monkeypatch.setenv("ADDE_NO_DAEMON", "0")
+    _call("pull_image", {"image": "busybox"}, bin_path="/fake/adde")
+    assert len(received) == 1
+
+
+def test_call_daemon_failed_result_raises(fake_daemon):
+    _, replies = fake_daemon
+    replies["pull_image"] = {"result": {"error": "image name is required"}, "failed": True}
+    with pytest.raises(RuntimeError, match="image name is required"):
+        _call("pull_image", {"image": ""}, bin_path="/fake/adde")
+
+
+def test_call_falls_back_to_subprocess_when_daemon_cannot_start(tmp_path, monkeypatch):
+    monkeypatch.setenv("ADDE_SOCKET", str(tmp_path / "adde.sock"))
+    monkeypatch.delenv("ADDE_NO_DAEMON", raising=False)
+    monkeypatch.setattr(_DaemonClient, "_instances", {})
+    monkeypatch.setattr(_DaemonClient, "_paths", {})
+    monkeypatch.setattr(_DaemonClient, "_unavailable", set())
+    with patch("adde.client._run") as run:
+        run.return_value = _completed(returncode=0, stdout=b'{"ok":true}', stderr=b"")
+        assert _call("pull_image", {"image": "busybox"}, bin_path=str(tmp_path / "missing-adde")) == {"ok": True}
+    run.assert_called_once()
+
+
+def test_socket_path_depends_on_binary_and_docker_env(tmp_path, monkeypatch):
+    from adde.client import _socket_path
+
+    monkeypatch.delenv("ADDE_SOCKET", raising=False)
+    monkeypatch.delenv("DOCKER_HOST", raising=False)
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    a, b = tmp_path / "a" / "adde", tmp_path / "b" / "adde"
+    for f in (a, b):
+        f.parent.mkdir()
+        f.write_bytes(b"#!/bin/sh\n")
+    path_a = _socket_path(str(a))
+    assert path_a == _socket_path(str(a))
+    assert _socket_path(str(b)) != path_a
+    monkeypatch.setenv("DOCKER_HOST", "tcp://elsewhere:2375")
+    assert _socket_path(str(a)) != path_a
+    monkeypatch.delenv("DOCKER_HOST")
+    os.utime(a, ns=(0, 0))  # "rebuilt"
+    assert _socket_path(str(a)) != path_a
+    assert _socket_path(str(tmp_path / "missing")) is None
+    monkeypatch.setenv("ADDE_SOCKET", "/run/pinned.sock")
+    assert _socket_path(str(b)) == "/run/pinned.sock"
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="Unix sockets only")
+def test_socket_dir_is_private(tmp_path, monkeypatch):
+    from adde.client import _DaemonClient, _socket_dir
+
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    sock_dir = _socket_dir()
+    assert sock_dir == str(tmp_path / "adde")
+    assert os.stat(sock_dir).st_mode & 0o777 == 0o700
+    os.chmod(sock_dir, 0o755)
+    assert _socket_dir() is None
+    os.chmod(sock_dir, 0o700)
+    # A socket bound by another user is never connected to.
+    (tmp_path / "adde" / "x.sock").touch()
+    monkeypatch.setattr(os, "getuid", lambda: os.stat(sock_dir).st_uid + 1)
+    assert _socket_dir() is None
+    with pytest.raises(PermissionError):
+        _DaemonClient(str(tmp_path / "adde" / "x.sock"))._open()
+
+
+def test_path_params_are_sent_absolute(mock_subprocess_run, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    mock_subprocess_run.return_value = _completed(returncode=0, stdout=b'{"results":[]}', stderr=b"")
+    pipeline([{"tool": "build_image_from_path", "params": {"path": "app", "tag": "agent-env:t"}}], bin_path="/fake/adde")
+    steps = json.loads(mock_subprocess_run.call_args.kwargs["input"])["steps"]
+    assert steps[0]["params"] == {"path": str(tmp_path / "app"), "tag": "agent-env:t"}
+
+
+def test_call_sends_large_payload_on_stdin(mock_subprocess_run, monkeypatch):
+    monkeypatch.setattr("adde.client._features", lambda bin_: frozenset({"code_content_gz"}))
+    mock_subprocess_run.return_value = _completed(returncode=0, stdout=b'{"log":{}}', stderr=b"")
+    code = "x = 1\n" * 100_000  # well past ARG_MAX on most systems
+    execute_code_block("cid", "big.py", code, bin_path="/fake/adde")
+    assert mock_subprocess_run.call_args[0][0] == ["/fake/adde", "execute_code_block"]
+    payload = json.loads(mock_subprocess_run.call_args.kwargs["input"])
+    assert "code_content" not in payload
+    assert gzip.decompress(base64.b64decode(payload["code_content_gz"])).decode() == code
+    assert len(payload["code_content_gz"]) < len(code) // 10
+
+
+def test_large_code_is_sent_plain_to_binaries_without_gzip(mock_subprocess_run, monkeypatch):
+    monkeypatch.setattr("adde.client._feature_cache", {})
+    # An older adde has no ping: the probe fails and the code goes out uncompressed.
+    mock_subprocess_run.return_value = _completed(returncode=2, stdout=b"", stderr=b"adde: unknown tool: ping")
+    code = "x = 1\n" * 1000
+    with pytest.raises(RuntimeError):
+        execute_code_block("cid", "big.py", code, bin_path="/old/adde")
+    assert json.loads(mock_subprocess_run.call_args.kwargs["input"]) == {
+        "container_id": "cid",
+        "filename": "big.py",
+        "timeout_sec": 30,
+        "code_content": code,
+    }
+
+
+def test_failed_feature_probe_is_not_cached(mock_subprocess_run, monkeypatch):
+    monkeypatch.setattr("adde.client._feature_cache", {})
+    mock_subprocess_run.side_effect = subprocess.TimeoutExpired(["/fake/adde", "ping"], 10)
+    assert _features("/fake/adde") == frozenset()
+    mock_subprocess_run.side_effect = None
+    mock_subprocess_run.return_value = _completed(
+        returncode=0, stdout=b'{"ok":true,"features":["code_content_gz"]}', stderr=b""
+    )
+    assert _features("/fake/adde") == {"code_content_gz"}
+    mock_subprocess_run.reset_mock()
+    assert _features("/fake/adde") == {"code_content_gz"}
+    mock_subprocess_run.assert_not_called()
+
+
+def test_run_captures_output_and_exit_code():
+    import sys
+    script = (
+        "import sys; data = sys.stdin.buffer.read(); "
+        "sys.stderr.write('err'); sys.stdout.buffer.write(data * 3); sys.exit(3)"
+    )
+    out = _run([sys.executable, "-c", script], input=b"x" * 200_000, timeout=30)
+    assert out.returncode == 3
+    assert out.stdout == b"x" * 600_000
+    assert out.stderr == b"err"
+
+
+def test_run_does_not_deadlock_when_child_writes_before_reading():
+    import sys
+    script = (
+        "import sys; sys.stdout.buffer.write(b'o' * 500_000); sys.stdout.flush(); "
+        "sys.stderr.buffer.write(b'e' * 500_000); sys.stderr.flush(); "
+        "sys.stdout.buffer.write(b'%d' % len(sys.stdin.buffer.read()))"
+    )
+    out = _run([sys.executable, "-c", script], input=b"i" * 500_000, timeout=30)
+    assert out.returncode == 0
+    assert out.stdout == b"o" * 500_000 + b"500000"
+    assert out.stderr == b"e" * 500_000
+
+
+def test_run_kills_child_on_timeout():
+    import sys
+    with pytest.raises(subprocess.TimeoutExpired):
+        _run([sys.executable, "-c", "import time; time.sleep(30)"], input=b"", timeout=0.5)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_run_in_parent_and_forked_child():
+    """Parent and child each get their own selector; a shared epoll mixes up their pipes."""
+    import sys
+    argv = [sys.executable, "-c", "import sys; sys.stdout.write(sys.stdin.read())"]
+    assert _run(argv, input=b"warm", timeout=30).stdout == b"warm"  # parent has its selector now
+    pid = os.fork()
+    if pid == 0:
+        ok = False
+        try:
+            ok = all(_run(argv, input=b"child", timeout=10).stdout == b"child" for _ in range(30))
+        finally:
+            os._exit(0 if ok else 1)
+    for _ in range(30):
+        assert _run(argv, input=b"parent", timeout=10).stdout == b"parent"
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+
+
+def test_communicate_threaded_stops_at_deadline():
+    import sys
+    from adde.client import _communicate_threaded
+
+    proc = subprocess.Popen(
+        [sys.executable, "-c", "import sys, time; sys.stdout.write(sys.stdin.read()); sys.stdout.flush(); time.sleep(30)"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    with proc:
+        try:
+            stdout, _, done = _communicate_threaded(proc, b"hi", time.monotonic() + 1.0)
+        finally:
+            proc.kill()
+    assert not done
+    assert stdout == b"hi"
+
+
+_FAKE_REPL = """\
+import json, os, sys
+assert sys.argv[1:] == ["repl"]
+for line in sys.stdin:
+    req = json.loads(line)
+    resp = {"id": req["id"]}
+    if req["tool"] == "sleep":
+        import time; time.sleep(30)
+    if req["tool"] == "unknown":
+        resp["error"] = "adde: unknown tool: unknown"
+    elif req["tool"] == "cleanup_env":
+        resp.update(result={"error": "no such container"}, failed=True)
+    else:
+        resp["result"] = {"pid": os.getpid(), "tool": req["tool"], "params": req["params"]}
+    print(json.dumps(resp), flush=True)
+"""
+
+
+def _fake_repl_bin(tmp_path):
+    import sys
+    fake = tmp_path / "adde"
+    fake.write_text(f"#!{sys.executable}\n" + _FAKE_REPL)
+    fake.chmod(0o755)
+    return str(fake)
+
+
+_FAKE_STREAM = """\
+import json, os, sys, time
+assert sys.argv[1:] == ["execute_code_block_stream"]
+params = json.loads(sys.stdin.read())
+if params["container_id"] == "gone":
+    sys.stderr.write("adde: docker client: no daemon")
+    sys.exit(1)
+print(json.dumps({"stream": "stdout", "data": "first\\n"}), flush=True)
+while not os.path.exists(params["filename"]):  # the test creates it after the first chunk
+    time.sleep(0.01)
+print(json.dumps({"stream": "stderr", "data": "warn\\n"}), flush=True)
+print(json.dumps({"done": True, "exit_code": 0, "execution_time": "0.10s"}), flush=True)
+"""
+
+
+@pytest.mark.skipif(os.name == "nt", reason="uses a script as the adde binary")
+def test_execute_code_block_stream_yields_chunks_as_they_arrive(tmp_path):
+    import sys
+    fake = tmp_path / "adde"
+    fake.write_text(f"#!{sys.executable}\n" + _FAKE_STREAM)
+    fake.chmod(0o755)
+    marker = tmp_path / "go-on"
+    frames = execute_code_block_stream("cid", str(marker), "echo first", bin_path=str(fake))
+    assert next(frames) == {"stream": "stdout", "data": "first\n"}
+    marker.touch()  # the script only continues once the first chunk was consumed
+    assert list(frames) == [
+        {"stream": "stderr", "data": "warn\n"},
+        {"done": True, "exit_code": 0, "execution_time": "0.10s"},
+    ]
+    with pytest.raises(RuntimeError, match="no daemon"):
+        list(execute_code_block_stream("gone", "t.sh", "echo", bin_path=str(fake)))
+
+
+@pytest.mark.skipif(os.name == "nt", reason="uses a script as the adde binary")
+def test_session_reuses_one_repl_process(tmp_path):
+    fake = _fake_repl_bin(tmp_path)
+    with Session(fake) as s:
+        a = s.call("pull_image", {"image": "busybox"})
+        b = s.call("list_agent_images")
+        assert a["params"] == {"image": "busybox"} and b["tool"] == "list_agent_images"
+        assert a["pid"] == b["pid"]
+        with pytest.raises(RuntimeError, match="unknown tool"):
+            s.call("unknown")
+        with pytest.raises(RuntimeError, match="no such container"):
+            s.call("cleanup_env", {"container_id": "x"})
+        proc = s._proc
+    assert proc.returncode == 0
+
+
+@pytest.mark.skipif(os.name == "nt", reason="uses a script as the adde binary")
+def test_session_accepts_pre_encoded_params(tmp_path):
+    with Session(_fake_repl_bin(tmp_path)) as s:
+        # Pretty-printed JSON still travels as one request line.
+        out = s.call("pull_image", json.dumps({"image": "a\nb"}, indent=2).encode())
+    assert out["params"] == {"image": "a\nb"}
+
+
+@pytest.mark.skipif(os.name == "nt", reason="uses a script as the adde binary")
+def test_session_timeout_restarts_repl(tmp_path):
+    with Session(_fake_repl_bin(tmp_path)) as s:
+        pid = s.call("ping")["pid"]
+        with pytest.raises(subprocess.TimeoutExpired):
+            s.call("sleep", timeout=0.5)
+        assert s.call("ping")["pid"] != pid
+
+
+@pytest.mark.skipif(os.name == "nt", reason="uses a script as the adde binary")
+def test_call_uses_resident_repl_without_unix_sockets(tmp_path, monkeypatch):
+    monkeypatch.delenv("ADDE_NO_DAEMON", raising=False)
+    monkeypatch.delattr(socket, "AF_UNIX")
+    monkeypatch.setattr("adde.client._repls", {})
+    fake = _fake_repl_bin(tmp_path)
+    try:
+        a = _call("pull_image", {"image": "busybox"}, bin_path=fake)
+        b = _call("list_local_images", {}, bin_path=fake)
+        assert a["params"] == {"image": "busybox"} and a["pid"] == b["pid"]
+    finally:
+        for repl in adde.client._repls.values():
+            repl.close()
+
+
 def test_pull_image_params(mock_subprocess_run):
-    mock_subprocess_run.return_value = MagicMock(returncode=0, stdout='{"ok":true}', stderr="")
+    mock_subprocess_run.return_value = _completed(returncode=0, stdout=b'{"ok":true}', stderr=b"")
     pull_image("busybox", bin_path="/fake/adde")
-    call_args = json.loads(mock_subprocess_run.call_args[0][0][2])
+    call_args = json.loads(mock_subprocess_run.call_args.kwargs["input"])
     assert call_args == {"image": "busybox"}
 
 
 def test_create_runtime_env_params(mock_subprocess_run):
-    mock_subprocess_run.return_value = MagicMock(
+    mock_subprocess_run.return_value = _completed(
         returncode=0,
-        stdout='{"container_id":"abc","workspace":"/tmp/x"}',
-        stderr="",
+        stdout=b'{"container_id":"abc","workspace":"/tmp/x"}',
+        stderr=b"",
     )
     create_runtime_env(
         image="python:3.11-slim",
@@ -96,7 +611,7 @@ def test_create_runtime_env_params(mock_subprocess_run):
         network=True,
         bin_path="/fake/adde",
     )
-    call_args = json.loads(mock_subprocess_run.call_args[0][0][2])
+    call_args = json.loads(mock_subprocess_run.call_args.kwargs["input"])
     assert call_args["image"] == "python:3.11-slim"
     assert call_args["dependencies"] == ["requests"]
     assert call_args["env_vars"] == {"X": "1"}
@@ -104,10 +619,10 @@ def test_create_runtime_env_params(mock_subprocess_run):
 
 
 def test_create_runtime_env_port_bindings(mock_subprocess_run):
-    mock_subprocess_run.return_value = MagicMock(
+    mock_subprocess_run.return_value = _completed(
         returncode=0,
-        stdout='{"container_id":"abc","workspace":"/tmp/x"}',
-        stderr="",
+        stdout=b'{"container_id":"abc","workspace":"/tmp/x"}',
+        stderr=b"",
     )
     create_runtime_env(
         image="node:20-alpine",
@@ -115,16 +630,16 @@ def test_create_runtime_env_port_bindings(mock_subprocess_run):
         network=True,
         bin_path="/fake/adde",
     )
-    call_args = json.loads(mock_subprocess_run.call_args[0][0][2])
+    call_args = json.loads(mock_subprocess_run.call_args.kwargs["input"])
     assert call_args["port_bindings"] == {"3000": "8080"}
     assert call_args["network"] is True
 
 
 def test_execute_code_block_params(mock_subprocess_run):
-    mock_subprocess_run.return_value = MagicMock(
+    mock_subprocess_run.return_value = _completed(
         returncode=0,
-        stdout='{"log":{"exit_code":0,"stdout":"42","stderr":"","execution_time":"0.1s"}}',
-        stderr="",
+        stdout=b'{"log":{"exit_code":0,"stdout":"42","stderr":"","execution_time":"0.1s"}}',
+        stderr=b"",
     )
     execute_code_block(
         container_id="cid",
@@ -133,7 +648,7 @@ def test_execute_code_block_params(mock_subprocess_run):
         timeout_sec=15,
         bin_path="/fake/adde",
     )
-    call_args = json.loads(mock_subprocess_run.call_args[0][0][2])
+    call_args = json.loads(mock_subprocess_run.call_args.kwargs["input"])
     assert call_args["container_id"] == "cid"
     assert call_args["filename"] == "t.py"
     assert call_args["code_content"] == "print(42)"
@@ -141,38 +656,152 @@ def test_execute_code_block_params(mock_subprocess_run):
 
 
 def test_get_container_logs_params(mock_subprocess_run):
-    mock_subprocess_run.return_value = MagicMock(
+    mock_subprocess_run.return_value = _completed(
         returncode=0,
-        stdout='{"log":{"exit_code":0,"stdout":"","stderr":"","execution_time":"0s"}}',
-        stderr="",
+        stdout=b'{"log":{"exit_code":0,"stdout":"","stderr":"","execution_time":"0s"}}',
+        stderr=b"",
     )
     get_container_logs(container_id="cid", tail_lines=10, bin_path="/fake/adde")
-    call_args = json.loads(mock_subprocess_run.call_args[0][0][2])
+    call_args = json.loads(mock_subprocess_run.call_args.kwargs["input"])
     assert call_args["container_id"] == "cid"
     assert call_args["tail_lines"] == 10
 
 
+def test_get_container_logs_framed(mock_subprocess_run, monkeypatch):
+    def section(data):
+        return struct.pack(">Q", len(data)) + data
+
+    frame = b"ADDEFRM1" + section(b'{"exit_code":1,"execution_time":"1.25s"}') + section(b"out\n") + section(b"err")
+    mock_subprocess_run.return_value = _completed(returncode=0, stdout=bytearray(frame), stderr=b"")
+    monkeypatch.delenv("ADDE_NO_DAEMON")  # framed output never goes through the daemon
+    r = get_container_logs("cid", framed=True, bin_path="/fake/adde")
+    assert isinstance(r, LogResult)
+    assert (r.exit_code, bytes(r.stdout), bytes(r.stderr), r.execution_time) == (1, b"out\n", b"err", 1.25)
+    assert json.loads(mock_subprocess_run.call_args.kwargs["input"])["framed"] is True
+
+    # An adde without framing support answers with JSON
+    mock_subprocess_run.return_value = _completed(
+        returncode=0,
+        stdout=b'{"log":{"exit_code":0,"stdout":"hi","stderr":"","execution_time":"0.10s"}}',
+        stderr=b"",
+    )
+    r = get_container_logs("cid", framed=True, bin_path="/fake/adde")
+    assert (r.exit_code, bytes(r.stdout), r.execution_time) == (0, b"hi", 0.1)
+
+
+def test_call_sends_pre_encoded_params_as_is(mock_subprocess_run):
+    mock_subprocess_run.return_value = _completed(returncode=0, stdout=b'{"ok":true}', stderr=b"")
+    raw = b'{"container_id":"cid"}'
+    assert _call("cleanup_env", raw, bin_path="/fake/adde") == {"ok": True}
+    assert mock_subprocess_run.call_args.kwargs["input"] == raw
+
+
+def test_repeat_pulls_reuse_encoded_params(mock_subprocess_run):
+    mock_subprocess_run.return_value = _completed(returncode=0, stdout=b'{"ok":true}', stderr=b"")
+    pull_image("busybox", force=True, bin_path="/fake/adde")
+    first = mock_subprocess_run.call_args.kwargs["input"]
+    pull_image("busybox", force=True, bin_path="/fake/adde")
+    assert mock_subprocess_run.call_args.kwargs["input"] is first
+    assert json.loads(first) == {"image": "busybox"}
+
+
 def test_cleanup_env_params(mock_subprocess_run):
-    mock_subprocess_run.return_value = MagicMock(returncode=0, stdout='{"ok":true}', stderr="")
+    mock_subprocess_run.return_value = _completed(returncode=0, stdout=b'{"ok":true}', stderr=b"")
     cleanup_env(container_id="cid", bin_path="/fake/adde")
-    call_args = json.loads(mock_subprocess_run.call_args[0][0][2])
+    call_args = json.loads(mock_subprocess_run.call_args.kwargs["input"])
     assert call_args == {"container_id": "cid"}
 
 
+def test_pipeline_params(mock_subprocess_run):
+    mock_subprocess_run.return_value = _completed(
+        returncode=0,
+        stdout=b'{"results":[{"container_id":"abc"},{"ok":true}]}',
+        stderr=b"",
+    )
+    steps = [
+        {"id": "env", "tool": "create_runtime_env", "params": {"image": "busybox"}},
+        {"tool": "cleanup_env", "bind": {"container_id": "$.env.container_id"}, "always": True},
+    ]
+    out = pipeline(steps, bin_path="/fake/adde")
+    args = mock_subprocess_run.call_args[0][0]
+    assert args[1] == "pipeline"
+    assert json.loads(mock_subprocess_run.call_args.kwargs["input"]) == {"steps": steps}
+    assert mock_subprocess_run.call_args.kwargs["timeout"] == 900
+    assert out["results"][0] == {"container_id": "abc"}
+
+
+def test_batch_runs_one_pipeline(mock_subprocess_run):
+    mock_subprocess_run.return_value = _completed(
+        returncode=0,
+        stdout=b'{"results":[{"container_id":"abc"},{"log":{"exit_code":0}}]}',
+        stderr=b"",
+    )
+    out = batch(
+        [
+            ("create_runtime_env", {"image": "busybox"}),
+            ("execute_code_block", {"filename": "t.sh"}, {"container_id": "$.step1.container_id"}),
+        ],
+        bin_path="/fake/adde",
+    )
+    assert mock_subprocess_run.call_count == 1
+    assert mock_subprocess_run.call_args[0][0][1] == "pipeline"
+    assert json.loads(mock_subprocess_run.call_args.kwargs["input"]) == {
+        "steps": [
+            {"tool": "create_runtime_env", "params": {"image": "busybox"}},
+            {"tool": "execute_code_block", "params": {"filename": "t.sh"}, "bind": {"container_id": "$.step1.container_id"}},
+        ]
+    }
+    assert out == [{"container_id": "abc"}, {"log": {"exit_code": 0}}]
+
+
+def test_batch_raises_on_failed_step(mock_subprocess_run):
+    mock_subprocess_run.return_value = _completed(
+        returncode=0,
+        stdout=b'{"results":[{"error":"no such image"},null],"failed_step":1,"error":"step 1 (create_runtime_env): no such image"}',
+        stderr=b"",
+    )
+    with pytest.raises(RuntimeError, match="no such image"):
+        batch([("create_runtime_env", {"image": "nope"}), ("list_agent_images", {})], bin_path="/fake/adde")
+
+
 def test_prepare_build_context_params(mock_subprocess_run):
-    mock_subprocess_run.return_value = MagicMock(
-        returncode=0, stdout='{"context_id":"/tmp/adde-build-xyz"}', stderr=""
+    mock_subprocess_run.return_value = _completed(
+        returncode=0, stdout=b'{"context_id":"/tmp/adde-build-xyz"}', stderr=b""
     )
     prepare_build_context(files={"main.py": "print(1)", "requirements.txt": "requests"}, bin_path="/fake/adde")
-    call_args = json.loads(mock_subprocess_run.call_args[0][0][2])
+    call_args = json.loads(mock_subprocess_run.call_args.kwargs["input"])
     assert call_args["files"] == {"main.py": "print(1)", "requirements.txt": "requests"}
 
 
+def test_prepare_build_context_tar_sends_gzipped_tar(mock_subprocess_run, tmp_path):
+    mock_subprocess_run.return_value = _completed(
+        returncode=0, stdout=b'{"context_id":"/tmp/adde-build-xyz"}', stderr=b""
+    )
+
+    def members(payload):
+        archive = base64.b64decode(payload["archive"])
+        with tarfile.open(fileobj=io.BytesIO(archive), mode="r:gz") as tar:
+            return {
+                os.path.normpath(m.name): tar.extractfile(m).read() for m in tar.getmembers() if m.isfile()
+            }
+
+    prepare_build_context_tar({"main.py": "print(1)", "logo.png": b"\x89PNG"}, bin_path="/fake/adde")
+    assert mock_subprocess_run.call_args[0][0][1] == "prepare_build_context_tar"
+    payload = json.loads(mock_subprocess_run.call_args.kwargs["input"])
+    assert members(payload) == {"main.py": b"print(1)", "logo.png": b"\x89PNG"}
+
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "app.py").write_text("x = 1")
+    prepare_build_context_tar(tmp_path, bin_path="/fake/adde")
+    payload = json.loads(mock_subprocess_run.call_args.kwargs["input"])
+    assert members(payload) == {os.path.join("src", "app.py"): b"x = 1"}
+
+
 def test_build_image_from_context_params(mock_subprocess_run):
-    mock_subprocess_run.return_value = MagicMock(
+    mock_subprocess_run.return_value = _completed(
         returncode=0,
-        stdout='{"status":"success","image_id":"sha256:abc","tag":"agent-env:v1","size_mb":100}',
-        stderr="",
+        stdout=b'{"status":"success","image_id":"sha256:abc","tag":"agent-env:v1","size_mb":100}',
+        stderr=b"",
     )
     build_image_from_context(
         context_id="/tmp/ctx",
@@ -180,17 +809,17 @@ def test_build_image_from_context_params(mock_subprocess_run):
         build_args={"FOO": "bar"},
         bin_path="/fake/adde",
     )
-    call_args = json.loads(mock_subprocess_run.call_args[0][0][2])
+    call_args = json.loads(mock_subprocess_run.call_args.kwargs["input"])
     assert call_args["context_id"] == "/tmp/ctx"
     assert call_args["tag"] == "agent-env:task-1"
     assert call_args["build_args"] == {"FOO": "bar"}
 
 
 def test_build_image_from_path_params(mock_subprocess_run):
-    mock_subprocess_run.return_value = MagicMock(
+    mock_subprocess_run.return_value = _completed(
         returncode=0,
-        stdout='{"status":"success","image_id":"sha256:xyz","tag":"agent-env:myapp-1","size_mb":80}',
-        stderr="",
+        stdout=b'{"status":"success","image_id":"sha256:xyz","tag":"agent-env:myapp-1","size_mb":80}',
+        stderr=b"",
     )
     build_image_from_path(
         path="/home/user/myproject",
@@ -198,59 +827,123 @@ def test_build_image_from_path_params(mock_subprocess_run):
         build_args={"VERSION": "1.0"},
         bin_path="/fake/adde",
     )
-    call_args = json.loads(mock_subprocess_run.call_args[0][0][2])
+    call_args = json.loads(mock_subprocess_run.call_args.kwargs["input"])
     assert call_args["path"] == "/home/user/myproject"
     assert call_args["tag"] == "agent-env:myapp-1"
     assert call_args["build_args"] == {"VERSION": "1.0"}
 
 
 def test_list_agent_images_params(mock_subprocess_run):
-    mock_subprocess_run.return_value = MagicMock(
-        returncode=0, stdout='{"images":[{"id":"sha256:x","tags":["agent-env:v1"],"size_mb":50}]}', stderr=""
+    mock_subprocess_run.return_value = _completed(
+        returncode=0, stdout=b'{"images":[{"id":"sha256:x","tags":["agent-env:v1"],"size_mb":50}]}', stderr=b""
     )
     list_agent_images(filter_tag="agent-env", bin_path="/fake/adde")
-    call_args = json.loads(mock_subprocess_run.call_args[0][0][2])
+    call_args = json.loads(mock_subprocess_run.call_args.kwargs["input"])
     assert call_args["filter_tag"] == "agent-env"
 
 
+def test_list_agent_images_is_cached_until_build(mock_subprocess_run):
+    mock_subprocess_run.return_value = _completed(
+        returncode=0, stdout=b'{"images":[{"id":"sha256:x","tags":["agent-env:v1"],"size_mb":50}]}', stderr=b""
+    )
+    first = list_agent_images(filter_tag="agent-env", bin_path="/fake/adde")
+    assert list_agent_images(filter_tag="agent-env", bin_path="/fake/adde") == first
+    assert mock_subprocess_run.call_count == 1
+    build_image_from_context("/tmp/ctx", "agent-env:v2", bin_path="/fake/adde")
+    list_agent_images(filter_tag="agent-env", bin_path="/fake/adde")
+    assert mock_subprocess_run.call_count == 3
+
+
+def test_build_image_from_context_skips_unchanged_context(mock_subprocess_run, tmp_path):
+    built = b'{"status":"success","image_id":"sha256:abc","tag":"agent-env:v1","size_mb":10}'
+    listing = b'{"images":[{"id":"sha256:abc","tags":["agent-env:v1"],"size_mb":10}]}'
+    mock_subprocess_run.side_effect = lambda argv, **kw: _completed(
+        returncode=0, stdout=listing if argv[1] == "list_agent_images" else built, stderr=b""
+    )
+
+    def context(name, main="print(1)"):
+        ctx = tmp_path / name
+        (ctx / "src").mkdir(parents=True)
+        (ctx / "src" / "main.py").write_text(main)
+        return str(ctx)
+
+    first = build_image_from_context(context("a"), "agent-env:v1", bin_path="/fake/adde")
+    assert "cached" not in first
+    again = build_image_from_context(context("b"), "agent-env:v1", bin_path="/fake/adde")
+    assert again == {**first, "cached": True}
+    build_image_from_context(context("c", main="print(2)"), "agent-env:v1", bin_path="/fake/adde")
+    build_image_from_context(context("d"), "agent-env:v1", force=True, bin_path="/fake/adde")
+    tools = [c[0][0][1] for c in mock_subprocess_run.call_args_list]
+    assert tools == ["build_image_from_context", "list_agent_images"] + ["build_image_from_context"] * 2
+
+
+def test_pull_image_skips_local_image(mock_subprocess_run):
+    mock_subprocess_run.return_value = _completed(
+        returncode=0,
+        stdout=b'{"tags":["busybox:latest","agent-env:v1"],"digests":["busybox@sha256:abc"]}',
+        stderr=b"",
+    )
+    for image in ("busybox", "busybox:latest", "busybox@sha256:abc", "agent-env:v1"):
+        assert pull_image(image, bin_path="/fake/adde") == {"ok": True, "cached": True}
+    mock_subprocess_run.assert_called_once()
+    assert mock_subprocess_run.call_args[0][0][1] == "list_local_images"
+
+
+def test_pull_image_missing_or_forced_still_pulls(mock_subprocess_run):
+    mock_subprocess_run.return_value = _completed(returncode=0, stdout=b'{"tags":["busybox:latest"]}', stderr=b"")
+    pull_image("alpine", bin_path="/fake/adde")
+    pull_image("busybox", force=True, bin_path="/fake/adde")
+    tools = [c[0][0][1] for c in mock_subprocess_run.call_args_list]
+    assert tools == ["list_local_images", "pull_image", "pull_image"]
+    assert json.loads(mock_subprocess_run.call_args.kwargs["input"]) == {"image": "busybox"}
+
+
 def test_prune_build_cache_params(mock_subprocess_run):
-    mock_subprocess_run.return_value = MagicMock(
-        returncode=0, stdout='{"space_reclaimed_mb":1024}', stderr=""
+    mock_subprocess_run.return_value = _completed(
+        returncode=0, stdout=b'{"space_reclaimed_mb":1024}', stderr=b""
     )
     prune_build_cache(older_than_hrs=24, bin_path="/fake/adde")
-    call_args = json.loads(mock_subprocess_run.call_args[0][0][2])
+    call_args = json.loads(mock_subprocess_run.call_args.kwargs["input"])
     assert call_args["older_than_hrs"] == 24
 
 
+def test_encoded_params_cache_keeps_int_and_float_apart(mock_subprocess_run):
+    mock_subprocess_run.return_value = _completed(returncode=0, stdout=b'{"ok":true}', stderr=b"")
+    prune_build_cache(older_than_hrs=24.0, bin_path="/fake/adde")
+    assert mock_subprocess_run.call_args.kwargs["input"] == b'{"older_than_hrs":24.0}'
+    prune_build_cache(older_than_hrs=24, bin_path="/fake/adde")
+    assert mock_subprocess_run.call_args.kwargs["input"] == b'{"older_than_hrs":24}'
+
+
 def test_delete_image_params(mock_subprocess_run):
-    mock_subprocess_run.return_value = MagicMock(
+    mock_subprocess_run.return_value = _completed(
         returncode=0,
-        stdout='{"ok":true,"deleted":["Untagged: agent-env:task-1"]}',
-        stderr="",
+        stdout=b'{"ok":true,"deleted":["Untagged: agent-env:task-1"]}',
+        stderr=b"",
     )
     delete_image("agent-env:task-1", bin_path="/fake/adde")
-    call_args = json.loads(mock_subprocess_run.call_args[0][0][2])
+    call_args = json.loads(mock_subprocess_run.call_args.kwargs["input"])
     assert call_args["image"] == "agent-env:task-1"
     assert "force" not in call_args or call_args.get("force") is False
 
 
 def test_delete_image_force_params(mock_subprocess_run):
-    mock_subprocess_run.return_value = MagicMock(
+    mock_subprocess_run.return_value = _completed(
         returncode=0,
-        stdout='{"ok":true,"deleted":["Deleted: sha256:abc123"]}',
-        stderr="",
+        stdout=b'{"ok":true,"deleted":["Deleted: sha256:abc123"]}',
+        stderr=b"",
     )
     delete_image("agent-env:myapp-1", force=True, bin_path="/fake/adde")
-    call_args = json.loads(mock_subprocess_run.call_args[0][0][2])
+    call_args = json.loads(mock_subprocess_run.call_args.kwargs["input"])
     assert call_args["image"] == "agent-env:myapp-1"
     assert call_args["force"] is True
 
 
 def test_delete_image_returns_ok_and_deleted(mock_subprocess_run):
-    mock_subprocess_run.return_value = MagicMock(
+    mock_subprocess_run.return_value = _completed(
         returncode=0,
-        stdout='{"ok":true,"deleted":["Untagged: agent-env:x","Deleted: sha256:abc"]}',
-        stderr="",
+        stdout=b'{"ok":true,"deleted":["Untagged: agent-env:x","Deleted: sha256:abc"]}',
+        stderr=b"",
     )
     out = delete_image("agent-env:x", bin_path="/fake/adde")
     assert out["ok"] is True
@@ -258,20 +951,21 @@ def test_delete_image_returns_ok_and_deleted(mock_subprocess_run):
 
 
 def test_delete_image_raises_on_error(mock_subprocess_run):
-    mock_subprocess_run.return_value = MagicMock(
+    mock_subprocess_run.return_value = _completed(
         returncode=1,
-        stdout="",
-        stderr="adde: no such image",
+        stdout=b"",
+        stderr=b"adde: no such image",
     )
     with pytest.raises(RuntimeError, match="no such image|adde delete_image failed"):
-        delete_image("nonexistent:tag", bin_path="/fake/adde")
+        delete_image("agent-env:nonexistent", bin_path="/fake/adde")
 
 
 # ---- Integration tests (real adde binary, optional) ----
 
 
+@functools.lru_cache(maxsize=1)
 def _adde_bin():
-    """Path to adde binary, or None if not found."""
+    """Path to adde binary, or None if not found (looked up once per run)."""
     if os.environ.get("ADDE_BIN"):
         p = os.environ["ADDE_BIN"]
         return p if os.path.isfile(p) else None
@@ -284,8 +978,18 @@ def _adde_bin():
 
 
 @pytest.fixture
-def adde_bin():
-    return _adde_bin()
+def adde_bin(tmp_path, monkeypatch):
+    """The adde binary, with a daemon socket of this test's own; a daemon it starts is stopped after."""
+    monkeypatch.setenv("ADDE_SOCKET", str(tmp_path / "adde.sock"))
+    monkeypatch.setattr(_DaemonClient, "_instances", {})
+    monkeypatch.setattr(_DaemonClient, "_paths", {})
+    monkeypatch.setattr(_DaemonClient, "_unavailable", set())
+    yield _adde_bin()
+    for daemon in _DaemonClient._instances.values():
+        daemon._close()
+        if daemon.proc is not None:
+            daemon.proc.terminate()
+            daemon.proc.wait()
 
 
 @pytest.mark.skipif(_adde_bin() is None, reason="adde binary not found (build go/ or set ADDE_BIN)")
@@ -301,7 +1005,6 @@ def test_integration_pull_image_empty_image_returns_error(adde_bin):
 @pytest.mark.skipif(_adde_bin() is None, reason="adde binary not found (build go/ or set ADDE_BIN)")
 def test_integration_usage_exit_code(adde_bin):
     """Calling adde with no tool shows usage and we see it via stderr when we bypass _call."""
-    import subprocess
     out = subprocess.run(
         [adde_bin],
         capture_output=True,
@@ -313,6 +1016,22 @@ def test_integration_usage_exit_code(adde_bin):
 
 
 @pytest.mark.skipif(_adde_bin() is None, reason="adde binary not found (build go/ or set ADDE_BIN)")
+def test_daemon_roundtrip(adde_bin, monkeypatch):
+    """Calls through a resident adde (repl over stdio, and serve over a Unix socket) need no Docker for ping."""
+    with Session(adde_bin) as s:
+        assert s.call("ping")["ok"] is True
+        assert "code_content_gz" in s.call("ping", timeout=10)["features"]
+        with pytest.raises(RuntimeError, match="unknown tool"):
+            s.call("no_such_tool")
+    if not hasattr(socket, "AF_UNIX"):
+        return
+    monkeypatch.delenv("ADDE_NO_DAEMON", raising=False)
+    assert _call("ping", {}, bin_path=adde_bin)["ok"] is True
+    assert _call("ping", {}, bin_path=adde_bin)["ok"] is True
+
+
+@pytest.mark.skipif(_adde_bin() is None, reason="adde binary not found (build go/ or set ADDE_BIN)")
+@pytest.mark.xdist_group("docker_pull")
 def test_integration_pull_image_ok_when_docker_up(adde_bin):
     """pull_image returns ok when image is pulled (Docker available)."""
     try:
@@ -324,6 +1043,7 @@ def test_integration_pull_image_ok_when_docker_up(adde_bin):
 
 
 @pytest.mark.skipif(_adde_bin() is None, reason="adde binary not found (build go/ or set ADDE_BIN)")
+@pytest.mark.xdist_group("docker_pull")
 def test_integration_e2e_busybox_when_docker_up(adde_bin):
     """Full flow: pull -> create -> execute .sh -> get_container_logs -> cleanup."""
     try:
@@ -357,6 +1077,35 @@ def test_integration_e2e_busybox_when_docker_up(adde_bin):
         cleanup_env(cid, bin_path=adde_bin)
 
 
+@pytest.mark.skipif(_adde_bin() is None, reason="adde binary not found (build go/ or set ADDE_BIN)")
+@pytest.mark.xdist_group("docker_pull")
+def test_integration_e2e_busybox_batch_when_docker_up(adde_bin):
+    """Same flow as above, with create -> execute -> logs -> cleanup in one adde invocation."""
+    try:
+        pull_image("busybox", bin_path=adde_bin)
+    except RuntimeError:
+        pytest.skip("Docker or pull failed")
+    cid = {"container_id": "$.step1.container_id"}
+    try:
+        env, out, logs, done = batch(
+            [
+                ("create_runtime_env", {"image": "busybox", "dependencies": [], "env_vars": {}}),
+                ("execute_code_block", {"filename": "t.sh", "code_content": "echo 42", "timeout_sec": 15}, cid),
+                ("get_container_logs", {"tail_lines": 10}, cid),
+                {"tool": "cleanup_env", "bind": cid, "always": True},
+            ],
+            bin_path=adde_bin,
+        )
+    except RuntimeError as e:
+        if "step 1" in str(e):
+            pytest.skip(f"create_runtime_env failed: {e}")
+        raise
+    assert out["log"]["stdout"].strip() == "42"
+    if logs.get("log"):
+        assert "42" in logs["log"].get("stdout", "")
+    assert done == {"ok": True}
+
+
 @pytest.mark.skipif(_adde_bin() is None, reason="adde binary not found (build go/ or set ADDE_BIN)")
 def test_integration_delete_image_nonexistent_returns_error(adde_bin):
     """delete_image with a non-existent image causes CLI to exit 1; client raises RuntimeError."""
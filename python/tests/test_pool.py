@@ -0,0 +1,77 @@
+"""
+Tests for adde.pool.ContainerPool (mocked subprocess; no binary or Docker needed).
+"""
+
+import json
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+from adde import ContainerPool, cleanup_env, create_runtime_env
+
+
+@pytest.fixture
+def adde_calls(monkeypatch):
+    """Patch adde.client._run: create_runtime_env hands out c1, c2, ...; returns the calls made."""
+    monkeypatch.setenv("ADDE_NO_DAEMON", "1")
+    calls = []
+    created = iter(range(1, 100))
+
+    def run(argv, input, timeout):
+        tool, params = argv[1], json.loads(input)
+        calls.append((tool, params.get("container_id")))
+        if tool == "create_runtime_env":
+            out = {"container_id": f"c{next(created)}", "workspace": "/tmp/ws"}
+        elif tool == "reset_env" and params["container_id"] == "c_broken":
+            return subprocess.CompletedProcess(argv, 1, b'{"ok":false,"error":"No such container"}', b"")
+        else:
+            out = {"ok": True}
+        return subprocess.CompletedProcess(argv, 0, json.dumps(out).encode(), b"")
+
+    with patch("adde.client._run", side_effect=run):
+        yield calls
+
+
+def test_pool_reuses_released_container(adde_calls):
+    pool = ContainerPool("busybox", size=1, bin_path="/fake/adde")
+    first = create_runtime_env("busybox", pool=pool)
+    assert first == {"container_id": "c1", "workspace": "/tmp/ws"}
+    assert cleanup_env("c1", pool=pool) == {"ok": True, "pooled": True}
+
+    again = create_runtime_env("busybox", pool=pool)
+    assert again["container_id"] == "c1" and again["pooled"] is True
+    assert adde_calls == [("create_runtime_env", None), ("reset_env", "c1")]
+
+
+def test_pool_removes_overflow_and_closes_idle(adde_calls):
+    pool = ContainerPool("busybox", size=1, bin_path="/fake/adde")
+    a = pool.acquire()["container_id"]
+    b = pool.acquire()["container_id"]
+    pool.release(a)
+    pool.release(b)  # pool full -> removed
+    pool.close()
+    removed = [cid for tool, cid in adde_calls if tool == "cleanup_env"]
+    assert removed == [b, a]
+
+
+def test_pool_rejects_foreign_container(adde_calls):
+    pool = ContainerPool("busybox", bin_path="/fake/adde")
+    with pytest.raises(ValueError):
+        cleanup_env("foreign", pool=pool)
+    assert adde_calls == []
+
+
+def test_pool_removes_container_whose_reset_fails(adde_calls):
+    pool = ContainerPool("busybox", size=2, bin_path="/fake/adde")
+    pool._in_use["c_broken"] = {"container_id": "c_broken", "workspace": None}
+    assert pool.release("c_broken") == {"ok": True}
+    assert adde_calls == [("reset_env", "c_broken"), ("cleanup_env", "c_broken")]
+    assert pool.acquire()["container_id"] == "c1"
+
+
+def test_pool_image_mismatch_raises(adde_calls):
+    pool = ContainerPool("busybox", bin_path="/fake/adde")
+    with pytest.raises(ValueError):
+        create_runtime_env("alpine", pool=pool)
+    assert adde_calls == []